@@ -0,0 +1,128 @@
+_DRAIN_BITS = 64  # аккумулятор сбрасывается целыми байтами, как только в нём набирается столько бит
+
+
+class BitWriter:
+    """
+    Запись битов старшим битом вперёд.
+    Биты копятся в целочисленном аккумуляторе и уходят в sink целыми байтами,
+    поэтому промежуточных строк из '0'/'1' не возникает.
+    :param sink: bytearray или файловый объект с методом write (по умолчанию новый bytearray)
+    """
+
+    def __init__(self, sink=None):
+        self.sink = bytearray() if sink is None else sink
+        self._write = self.sink.extend if isinstance(self.sink, bytearray) else self.sink.write
+        self._acc = 0
+        self._nbits = 0
+        self.bits_written = 0
+
+    def write(self, value, length):
+        self._acc = (self._acc << length) | value
+        self._nbits += length
+        self.bits_written += length
+        if self._nbits >= _DRAIN_BITS:
+            self._drain()
+
+    def write_symbols(self, symbols, codes, lengths):
+        """
+        Запись кодов для последовательности символов
+        :param symbols: итерируемая последовательность символов
+        :param codes: коды символов (int), индекс — символ
+        :param lengths: длины кодов в битах, индекс — символ
+        """
+        acc = self._acc
+        nbits = self._nbits
+        total = 0
+        write = self._write
+
+        for symbol in symbols:
+            length = lengths[symbol]
+            acc = (acc << length) | codes[symbol]
+            nbits += length
+            total += length
+            if nbits >= _DRAIN_BITS:
+                rest = nbits & 7
+                write((acc >> rest).to_bytes(nbits >> 3, 'big'))
+                acc &= (1 << rest) - 1
+                nbits = rest
+
+        self._acc = acc
+        self._nbits = nbits
+        self.bits_written += total
+
+    def _drain(self):
+        rest = self._nbits & 7
+        self._write((self._acc >> rest).to_bytes(self._nbits >> 3, 'big'))
+        self._acc &= (1 << rest) - 1
+        self._nbits = rest
+
+    def flush(self):
+        """
+        Дописывает нулевые биты до границы байта и сбрасывает аккумулятор
+        :return: количество добавленных бит выравнивания (0..7)
+        """
+        padding = -self._nbits % 8
+        if padding:
+            self._acc <<= padding
+            self._nbits += padding
+        if self._nbits:
+            self._drain()
+        return padding
+
+    def getvalue(self):
+        return bytes(self.sink)
+
+
+class BitReader:
+    """
+    Чтение битов старшим битом вперёд из bytes-подобного объекта.
+    За концом данных читаются нули; сколько значащих бит осталось, показывает bits_left.
+    :param data: bytes, bytearray или memoryview
+    :param total_bits: количество значащих бит (по умолчанию все биты data)
+    """
+
+    def __init__(self, data, total_bits=None):
+        self._data = memoryview(data).cast('B')
+        self.total_bits = len(self._data) * 8 if total_bits is None else total_bits
+        self._pos = 0
+        self._acc = 0
+        self._nbits = 0
+        self.bits_read = 0
+
+    @property
+    def bits_left(self):
+        return self.total_bits - self.bits_read
+
+    def _fill(self, length):
+        need = (length - self._nbits + 7) >> 3
+        chunk = bytes(self._data[self._pos:self._pos + need])
+        self._pos += need
+        if len(chunk) < need:
+            chunk += bytes(need - len(chunk))
+        self._acc = (self._acc << (need * 8)) | int.from_bytes(chunk, 'big')
+        self._nbits += need * 8
+
+    def peek(self, length):
+        if self._nbits < length:
+            self._fill(length)
+        return self._acc >> (self._nbits - length)
+
+    def skip(self, length):
+        if self._nbits < length:
+            self._fill(length)
+        self._nbits -= length
+        self._acc &= (1 << self._nbits) - 1
+        self.bits_read += length
+
+    def read(self, length):
+        if self._nbits < length:
+            self._fill(length)
+        self._nbits -= length
+        value = self._acc >> self._nbits
+        self._acc &= (1 << self._nbits) - 1
+        self.bits_read += length
+        return value
+
+    def align(self):
+        """Пропускает биты до границы байта"""
+        self.skip(self._nbits & 7)
@@ -1,47 +1,150 @@
+import struct
+
+import numpy as np
+
+BLOCK_HEADER = struct.Struct('>I')  # первичный индекс блока
+
+
+def suffix_array(data: bytes) -> np.ndarray:
+    """
+    Суффиксный массив удвоением префиксов на NumPy: на шаге k суффиксы сортируются по паре
+    (ранг первых k байт, ранг следующих k байт). Шагов не больше log2(n), памяти O(n),
+    копии суффиксов не создаются. Порядок обычный лексикографический: префикс идёт раньше.
+    """
+    n = len(data)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    rank = np.frombuffer(data, dtype=np.uint8).astype(np.int64)
+    base = max(n, 256) + 1  # ранги меньше base, поэтому пара кодируется одним числом без коллизий
+    k = 1
+    while True:
+        # 0 — суффикс закончился, он меньше любого продолжения
+        second = np.zeros(n, dtype=np.int64)
+        if k < n:
+            second[:n - k] = rank[k:] + 1
+        key = rank * base + second
+        sa = np.argsort(key, kind='stable')
+
+        sorted_key = key[sa]
+        sorted_rank = np.empty(n, dtype=np.int64)
+        sorted_rank[0] = 0
+        np.cumsum(sorted_key[1:] != sorted_key[:-1], out=sorted_rank[1:])
+        rank = np.empty(n, dtype=np.int64)
+        rank[sa] = sorted_rank
+
+        if sorted_rank[-1] == n - 1:
+            return sa
+        k *= 2
+
+
 def bwt_transform(data: bytes) -> bytes:
     if not data:
         return b""
 
     data = data + b"\x00"  # хуйня чтобы не запоминать цифру другой хуйни
-    suffix_array = sorted(range(len(data)), key=lambda i: data[i:])
-    return bytes(data[i - 1] for i in suffix_array)
+    sa = suffix_array(data)
+    return np.frombuffer(data, dtype=np.uint8)[sa - 1].tobytes()
+
+
+def lf_mapping(last_column: bytes) -> np.ndarray:
+    """
+    LF-отображение: строка i переходит в строку C[L[i]] + (сколько раз L[i] встречалось в L[:i]).
+    C — накопленные частоты байт, поэтому это ровно обратная перестановка к устойчивой сортировке L.
+    """
+    column = np.frombuffer(last_column, dtype=np.uint8)
+    order = np.argsort(column, kind='stable')
+    lf = np.empty(len(column), dtype=np.int64)
+    lf[order] = np.arange(len(column), dtype=np.int64)
+    return lf
 
 
 def bwt_inverse(data: bytes) -> bytes:
+    """
+    Обратное BWT за O(n): LF-отображение считается на NumPy, затем один проход по нему.
+    Строка 0 всегда соответствует суффиксу из одного нулевого маркера, поэтому обход начинается с неё
+    и восстанавливает данные с конца, без поиска маркера.
+    """
     if not data:
         return b""
 
     n = len(data)
-    table = [bytearray() for _ in range(n)]
+    lf = lf_mapping(data).tolist()
+    output = bytearray(n - 1)
+    row = 0
 
-    for _ in range(n):
-        table = sorted(bytes([data[i]]) + table[i] for i in range(n))
+    for k in range(n - 2, -1, -1):
+        output[k] = data[row]
+        row = lf[row]
 
-    for row in table:
-        if row.endswith(b"\x00"):
-            return row[:-1]
-    return b""
+    return bytes(output)
 
 
-def bwt_transform_for_big_data(data: bytes, block_size=1024 * 64):
-    transformed = b""
-    data_array = bytearray(data)
+def bwt_transform_indexed(data: bytes) -> tuple[bytes, int]:
+    """
+    BWT без маркера конца: выход той же длины, что и вход, плюс первичный индекс.
+    Маркер остаётся только воображаемым — suffix_array и так ставит префикс раньше продолжения,
+    то есть ведёт себя так, будто в конце стоит байт меньше любого. Из столбца с маркером
+    выбрасывается сам маркер, а его позиция сохраняется как первичный индекс,
+    поэтому нулевые байты во входе допустимы.
+    """
+    if not data:
+        return b"", 0
 
-    for block_first_index in range(0, len(data), block_size):
-        new_block = data_array[block_first_index:block_first_index + block_size]
-        transformed += bwt_transform(bytes(new_block))
+    sa = suffix_array(data)
+    column = np.frombuffer(data, dtype=np.uint8)
+    primary_index = int(np.flatnonzero(sa == 0)[0])
+
+    output = np.empty(len(data), dtype=np.uint8)
+    output[0] = column[-1]  # строка воображаемого маркера
+    rest = np.delete(sa, primary_index)
+    output[1:] = column[rest - 1]
+    return output.tobytes(), primary_index
+
+
+def bwt_inverse_indexed(data: bytes, primary_index: int) -> bytes:
+    """
+    Обратное к bwt_transform_indexed. Маркер стоял бы сразу после позиции primary_index и был бы
+    меньше всех байт, поэтому LF-отображение то же, что и в bwt_inverse, только сдвинутое на его строку.
+    """
+    n = len(data)
+    if not n:
+        return b""
+    if not 0 <= primary_index < n:
+        raise ValueError(f"Первичный индекс вне блока: {primary_index}")
 
-    return transformed
+    lf = lf_mapping(data) + 1  # строка 0 занята маркером
+    lf[lf > primary_index] -= 1  # строки после маркера в data сдвинуты на одну
+    lf = lf.tolist()
+    output = bytearray(n)
+    row = 0
 
+    for k in range(n - 1, -1, -1):
+        output[k] = data[row]
+        row = lf[row]
 
-def bwt_inverse_for_big_data(data: bytes, block_size=1024 * 64):
-    inversed = b""
-    data_array = bytearray(data)
-    extra_char = 0
+    return bytes(output)
+
+
+def bwt_transform_for_big_data(data: bytes, block_size=1024 * 900) -> bytes:
+    """Поблочное BWT: перед каждым блоком записывается заголовок BLOCK_HEADER с первичным индексом"""
+    transformed = bytearray()
 
     for block_first_index in range(0, len(data), block_size):
-        new_block = data_array[block_first_index + extra_char:block_first_index + block_size + (extra_char + 1)]
-        inversed += bwt_inverse(bytes(new_block))
-        extra_char += 1
+        block, primary_index = bwt_transform_indexed(data[block_first_index:block_first_index + block_size])
+        transformed += BLOCK_HEADER.pack(primary_index)
+        transformed += block
+
+    return bytes(transformed)
+
+
+def bwt_inverse_for_big_data(data: bytes, block_size=1024 * 900) -> bytes:
+    inversed = bytearray()
+    step = BLOCK_HEADER.size + block_size
+
+    for block_first_index in range(0, len(data), step):
+        primary_index, = BLOCK_HEADER.unpack_from(data, block_first_index)
+        block = data[block_first_index + BLOCK_HEADER.size:block_first_index + step]
+        inversed += bwt_inverse_indexed(block, primary_index)
 
-    return inversed
+    return bytes(inversed)
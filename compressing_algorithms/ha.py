@@ -1,5 +1,11 @@
+from array import array
+
+from compressing_algorithms.bitio import BitWriter
 from util import count_symb as ca
-import queue
+import heapq
+import struct
+
+MAX_CODE_LENGTH = 15  # ограничение длины кода, чтобы таблица декодирования была не больше 2^15
 
 
 class HuffmanNode:
@@ -23,65 +29,218 @@ def load_huffman_codes(code_file_path):
     return code_map
 
 
+def _tree_code_lengths(frequencies):
+    lengths = [0] * len(frequencies)
+    heap = [HuffmanNode(char=char, frequency=freq) for char, freq in enumerate(frequencies) if freq > 0]
+
+    if not heap:
+        return lengths
+    if len(heap) == 1:
+        # один символ всё равно должен занимать хотя бы бит, иначе его нельзя посчитать при распаковке
+        lengths[heap[0].char] = 1
+        return lengths
+
+    heapq.heapify(heap)
+    while len(heap) > 1:
+        left = heapq.heappop(heap)
+        right = heapq.heappop(heap)
+        heapq.heappush(heap, HuffmanNode(left=left, right=right, frequency=left.frequency + right.frequency))
+
+    stack = [(heap[0], 0)]
+    while stack:
+        node, depth = stack.pop()
+        if node.char is not None:
+            lengths[node.char] = depth
+        else:
+            stack.append((node.left, depth + 1))
+            stack.append((node.right, depth + 1))
+
+    return lengths
+
+
+def build_code_lengths(freq_table, max_length=MAX_CODE_LENGTH):
+    """
+    Длины кодов Хаффмана для каждого символа алфавита.
+    Если дерево получается глубже max_length, частоты делятся пополам (как в bzip2) и дерево строится заново.
+    :param freq_table: частоты символов, индекс — символ
+    :param max_length: максимальная длина кода в битах
+    """
+    frequencies = [int(freq) for freq in freq_table]
+    while True:
+        lengths = _tree_code_lengths(frequencies)
+        if max(lengths, default=0) <= max_length:
+            return lengths
+        frequencies = [freq // 2 + 1 if freq else 0 for freq in frequencies]
+
+
+def canonical_codes(lengths):
+    """Канонические коды: символы упорядочены по (длина кода, символ), код следующего = код предыдущего + 1"""
+    codes = [0] * len(lengths)
+    code = 0
+    prev_length = 0
+    for length, char in sorted((length, char) for char, length in enumerate(lengths) if length > 0):
+        code <<= length - prev_length
+        codes[char] = code
+        code += 1
+        prev_length = length
+    return codes
+
+
+def canonical_code_map(lengths):
+    codes = canonical_codes(lengths)
+    return {char: f"{codes[char]:0{length}b}" for char, length in enumerate(lengths) if length > 0}
+
+
+def code_lengths(encoding_map):
+    lengths = [0] * (max(encoding_map, default=-1) + 1)
+    for char, code in encoding_map.items():
+        lengths[char] = len(code)
+    return lengths
+
+
+def pack_code_lengths(lengths):
+    """
+    Заголовок канонического кода: число символов (2 байта, big-endian),
+    затем длины кодов по полбайта на символ. Нулевой хвост алфавита не хранится.
+    """
+    count = len(lengths)
+    while count and not lengths[count - 1]:
+        count -= 1
+
+    header = bytearray(struct.pack('>H', count))
+    for i in range(0, count, 2):
+        low = lengths[i + 1] if i + 1 < count else 0
+        header.append((lengths[i] << 4) | low)
+    return bytes(header)
+
+
+def unpack_code_lengths(data, offset=0):
+    """
+    Разбор заголовка из pack_code_lengths
+    :return: (длины кодов, смещение первого байта после заголовка)
+    """
+    count = struct.unpack_from('>H', data, offset)[0]
+    offset += 2
+    packed = data[offset:offset + (count + 1) // 2]
+    if len(packed) < (count + 1) // 2:
+        raise ValueError("Обрезанный заголовок кодов Хаффмана")
+
+    lengths = []
+    for byte in packed:
+        lengths.append(byte >> 4)
+        lengths.append(byte & 0x0F)
+    return lengths[:count], offset + len(packed)
+
+
+def read_code_lengths(file):
+    """Чтение заголовка из pack_code_lengths из файла; None, если файл закончился"""
+    count_bytes = file.read(2)
+    if not count_bytes:
+        return None
+    count = struct.unpack('>H', count_bytes)[0]
+    return unpack_code_lengths(count_bytes + file.read((count + 1) // 2))[0]
+
+
+def build_decode_table(encoding_map):
+    """
+    Таблица декодирования по префиксному коду.
+    Индекс — следующие table_bits бит потока, значение — (символ, длина его кода),
+    поэтому на каждый символ приходится один поиск в таблице.
+    :return: (таблица, table_bits)
+    """
+    table_bits = max((len(code) for code in encoding_map.values()), default=0)
+    table = [None] * (1 << table_bits)
+
+    for char, code in encoding_map.items():
+        if not code:
+            continue
+        span = 1 << (table_bits - len(code))
+        first = int(code, 2) * span
+        table[first:first + span] = [(char, len(code))] * span
+
+    return table, table_bits
+
+
+def huffman_decode(payload, total_bits, table, table_bits):
+    """
+    Табличное декодирование total_bits бит из payload
+    :param payload: байты закодированного потока (без байта выравнивания)
+    :param total_bits: количество значащих бит
+    :param table: таблица из build_decode_table
+    :param table_bits: ширина индекса таблицы в битах
+    :return: bytes, а если в таблице есть символы больше 255 — array('H')
+    """
+    wide = any(entry is not None and entry[0] > 255 for entry in table)
+    output = array('H') if wide else bytearray()
+    if table_bits == 0 or total_bits <= 0:
+        return output if wide else bytes(output)
+
+    # нулевой хвост, чтобы последние коды можно было искать в таблице целым окном
+    data = bytes(payload) + bytes(table_bits // 8 + 1)
+    masks = [(1 << bits) - 1 for bits in range(table_bits + 8)]
+    index_mask = masks[table_bits]
+    acc = 0
+    nbits = 0
+    pos = 0
+    consumed = 0
+
+    while consumed < total_bits:
+        while nbits < table_bits:
+            acc = (acc << 8) | data[pos]
+            pos += 1
+            nbits += 8
+        char, length = table[(acc >> (nbits - table_bits)) & index_mask]
+        output.append(char)
+        nbits -= length
+        acc &= masks[nbits]
+        consumed += length
+
+    return output if wide else bytes(output)
+
+
+def huffman_encode(input_data, encoding_map):
+    """
+    Кодирование данных готовой таблицей кодов
+    :param input_data: bytes или последовательность символов (int), в том числе больше 255
+    :return: байт с числом бит выравнивания + упакованный поток
+    """
+    alphabet_size = max(256, max(encoding_map, default=0) + 1)
+    codes = [0] * alphabet_size
+    lengths = [0] * alphabet_size
+    for char, code in encoding_map.items():
+        codes[char] = int(code, 2) if code else 0
+        lengths[char] = len(code)
+
+    compressed = bytearray(1)
+    writer = BitWriter(compressed)
+    writer.write_symbols(input_data, codes, lengths)
+    compressed[0] = writer.flush()
+
+    return bytes(compressed)
+
+
 def huffman_compress(input_data):
     freq_table = ca.count_symb(input_data)
-    leaf_nodes = []
-    min_heap = queue.PriorityQueue()
-
-    for char in range(256):
-        if freq_table[char] > 0:
-            node = HuffmanNode(char=char, frequency=freq_table[char])
-            leaf_nodes.append(node)
-            min_heap.put(node)
-
-    while min_heap.qsize() > 1:
-        left = min_heap.get()
-        right = min_heap.get()
-        merged = HuffmanNode(
-            left=left,
-            right=right,
-            frequency=left.frequency + right.frequency
-        )
-        left.parent = merged
-        right.parent = merged
-        min_heap.put(merged)
-
-    encoding_map = {}
-    for node in leaf_nodes:
-        current = node
-        code_bits = []
-        while current.parent:
-            code_bits.insert(0, '0' if current.parent.left == current else '1')
-            current = current.parent
-        encoding_map[node.char] = ''.join(code_bits)
-
-    bit_stream = ''.join(encoding_map[byte] for byte in input_data)
-
-    pad_length = (8 - len(bit_stream) % 8)
-    padded_stream = f"{pad_length:08b}{bit_stream}{'0' * pad_length}"
-
-    compressed = bytearray()
-    for i in range(0, len(padded_stream), 8):
-        compressed.append(int(padded_stream[i:i + 8], 2))
-
-    return bytes(compressed), encoding_map
+    encoding_map = canonical_code_map(build_code_lengths(freq_table))
 
+    return huffman_encode(input_data, encoding_map), encoding_map
 
-def huffman_decompress(compressed_data, encoding_map):
-    pad_info = compressed_data[0]
-    bit_stream = ''.join(f"{byte:08b}" for byte in compressed_data[1:])
 
-    if pad_info > 0:
-        bit_stream = bit_stream[:-pad_info]
+def huffman_pack(input_data, alphabet_size=256):
+    """
+    Сжатие с собственным кодом: таблица строится по частотам input_data
+    :return: (заголовок pack_code_lengths, поток huffman_encode)
+    """
+    encoding_map = canonical_code_map(build_code_lengths(ca.count_symb(input_data, alphabet_size)))
+    return pack_code_lengths(code_lengths(encoding_map)), huffman_encode(input_data, encoding_map)
+
 
-    decoding_map = {code: char for char, code in encoding_map.items()}
-    buffer = ""
-    output = bytearray()
+def huffman_decompress(compressed_data, encoding_map):
+    if not compressed_data:
+        return b''
 
-    for bit in bit_stream:
-        buffer += bit
-        if buffer in decoding_map:
-            output.append(decoding_map[buffer])
-            buffer = ""
+    pad_info = compressed_data[0]
+    total_bits = (len(compressed_data) - 1) * 8 - pad_info
+    table, table_bits = build_decode_table(encoding_map)
 
-    return bytes(output)
\ No newline at end of file
+    return huffman_decode(memoryview(compressed_data)[1:], total_bits, table, table_bits)
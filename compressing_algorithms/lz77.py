@@ -1,5 +1,38 @@
 import sys
 import time
+from array import array
+
+import numpy as np
+
+MIN_MATCH = 3
+MAX_FIXED_VALUE = 0xFFFF  # в формате TOKENS_FIXED смещение и длина хранятся в двух байтах
+DEFAULT_LEVEL = 6
+HASH_BITS = 16  # размер таблицы head: 2 ** HASH_BITS корзин, независимо от размера входа
+
+TOKENS_FIXED = 1  # совпадение — (смещение, длина) по 2 байта, литерал — четыре нулевых байта и сам байт
+TOKENS_VARINT = 2  # varint с флагом в младшем бите: 1 — совпадение (длина, затем смещение), 0 — серия литералов
+
+GREEDY = 'greedy'  # берётся самое длинное совпадение в текущей позиции
+LAZY = 'lazy'  # совпадение откладывается, если в следующей позиции нашлось более длинное
+OPTIMAL = 'optimal'  # разбор с минимальной оценкой размера токенов (динамическое программирование)
+
+# уровень сжатия: (глубина просмотра цепочки, длина совпадения, после которой поиск прекращается, стратегия)
+LEVELS = {
+    1: (4, 8, GREEDY),
+    2: (8, 16, GREEDY),
+    3: (16, 32, GREEDY),
+    4: (16, 32, LAZY),
+    5: (32, 64, LAZY),
+    6: (128, 258, LAZY),
+    7: (256, 258, LAZY),
+    8: (64, 64, OPTIMAL),
+    9: (256, 128, OPTIMAL),
+}
+
+_HASH_SHIFT = 32 - HASH_BITS  # мультипликативный хэш: берутся старшие HASH_BITS бит младшего 32-битного слова
+_HASH_MASK = (1 << HASH_BITS) - 1
+
+OPTIMAL_SEGMENT = 1 << 16  # оптимальный разбор ведётся кусками такого размера, чтобы память не зависела от входа
 
 
 def print_progress(iteration: int, total: int, prefix: str = '', suffix: str = '', length: int = 50, fill: str = '█'):
@@ -21,96 +54,524 @@ def print_progress(iteration: int, total: int, prefix: str = '', suffix: str = '
         print()
 
 
-def lz77_compress(data: bytes, buffer_size: int = 1024, max_length: int = 255, show_progress: bool = True) -> bytes:
-    encoded_data = bytearray()
-    i = 0
+class HashChain:
+    """
+    Поиск совпадений LZ77 по цепочкам хэшей.
+    head хранит последнюю позицию для каждого хэша 3-байтового префикса, prev — предыдущую позицию
+    с тем же хэшем (кольцевой буфер размером с окно), поэтому просматриваются только
+    кандидаты с совпадающим (с точностью до коллизий) началом, и не больше max_chain штук.
+    Обе таблицы фиксированного размера: память O(окно + 2 ** HASH_BITS) при любом входе.
+    """
+
+    def __init__(self, data: bytes, window_size: int, max_chain: int, nice_length: int):
+        self.data = data
+        self.window_size = window_size
+        self.max_chain = max_chain
+        self.nice_length = nice_length
+        self.head = array('q', [-1]) * (1 << HASH_BITS)
+        self.mask = (1 << (window_size - 1).bit_length()) - 1
+        self.prev = array('q', [-1]) * (self.mask + 1)
+        self.next_pos = 0
+
+    def insert(self, pos: int):
+        data = self.data
+        if pos + MIN_MATCH > len(data):
+            return
+        key = (((data[pos] << 16) | (data[pos + 1] << 8) | data[pos + 2]) * 0x9E3779B1 >> _HASH_SHIFT) & _HASH_MASK
+        self.prev[pos & self.mask] = self.head[key]
+        self.head[key] = pos
+
+    def insert_until(self, pos: int):
+        """Вставляет все ещё не вставленные позиции меньше pos"""
+        for p in range(self.next_pos, pos):
+            self.insert(p)
+        self.next_pos = max(self.next_pos, pos)
+
+    def shift(self, offset: int):
+        """
+        Начало данных отброшено: все позиции уменьшаются на offset, позиции до начала забываются.
+        offset кратен размеру prev, поэтому слоты кольцевого буфера остаются на своих местах.
+        """
+        for table in (self.head, self.prev):
+            positions = np.frombuffer(table, dtype=np.int64)
+            positions -= offset
+            positions[positions < 0] = -1
+        self.next_pos = max(0, self.next_pos - offset)
+
+    def find(self, pos: int, max_length: int) -> tuple:
+        """
+        Самое длинное совпадение для позиции pos среди уже вставленных позиций окна
+        :return: (длина, смещение) или (0, 0), если совпадения не короче MIN_MATCH нет
+        """
+        data = self.data
+        if max_length < MIN_MATCH:
+            return 0, 0
+
+        key = (((data[pos] << 16) | (data[pos + 1] << 8) | data[pos + 2]) * 0x9E3779B1 >> _HASH_SHIFT) & _HASH_MASK
+        # в корзине могут быть позиции с другим префиксом или старше окна: их отсекают сравнение и limit
+        candidate = self.head[key]
+        limit = pos - self.window_size
+        nice_length = min(self.nice_length, max_length)
+        chain = self.max_chain
+        best_length = 0
+        best_offset = 0
+
+        while candidate >= 0 and candidate >= limit and chain > 0:
+            # сначала сравниваем байт, на котором текущий лучший кандидат бы проиграл
+            if best_length < max_length and data[candidate + best_length] == data[pos + best_length]:
+                length = match_length(data, candidate, pos, max_length)
+                if length > best_length:
+                    best_length = length
+                    best_offset = pos - candidate
+                    if length >= nice_length:
+                        break
+            candidate = self.prev[candidate & self.mask]
+            chain -= 1
+
+        if best_length < MIN_MATCH:
+            return 0, 0
+        return best_length, best_offset
+
+    def find_all(self, pos: int, max_length: int) -> list:
+        """
+        Все улучшающиеся совпадения для позиции pos вдоль цепочки
+        :return: список (длина, смещение) по возрастанию длины; у каждой длины — ближайшее смещение
+        """
+        data = self.data
+        matches = []
+        if max_length < MIN_MATCH:
+            return matches
+
+        key = (((data[pos] << 16) | (data[pos + 1] << 8) | data[pos + 2]) * 0x9E3779B1 >> _HASH_SHIFT) & _HASH_MASK
+        # в корзине могут быть позиции с другим префиксом или старше окна: их отсекают сравнение и limit
+        candidate = self.head[key]
+        limit = pos - self.window_size
+        nice_length = min(self.nice_length, max_length)
+        chain = self.max_chain
+        best_length = MIN_MATCH - 1
+
+        while candidate >= 0 and candidate >= limit and chain > 0:
+            if best_length < max_length and data[candidate + best_length] == data[pos + best_length]:
+                length = match_length(data, candidate, pos, max_length)
+                if length > best_length:
+                    best_length = length
+                    matches.append((length, pos - candidate))
+                    if length >= nice_length:
+                        break
+            candidate = self.prev[candidate & self.mask]
+            chain -= 1
+
+        return matches
+
+
+def match_length(data: bytes, source: int, pos: int, max_length: int) -> int:
+    """Длина общего префикса data[source:] и data[pos:], не больше max_length (source < pos, перекрытие допустимо)"""
+    length = 0
+    while length + 16 <= max_length and data[source + length:source + length + 16] == data[pos + length:pos + length + 16]:
+        length += 16
+    while length < max_length and data[source + length] == data[pos + length]:
+        length += 1
+    return length
+
+
+def _parse_greedy(finder: HashChain, n: int, max_length: int, lazy: bool, start: int = 0, stop: int = None):
+    """
+    Жадный (или ленивый) разбор: выдаёт совпадения (позиция, длина, смещение) по возрастанию позиции.
+    Разбираются позиции [start, stop); совпадение может выйти за stop, но не за n.
+    """
+    stop = n if stop is None else stop
+    i = start
+    pending = None
+
+    while i < stop:
+        finder.insert_until(i)
+        if pending:
+            match_len, offset = pending
+            pending = None
+        else:
+            match_len, offset = finder.find(i, min(max_length, n - i))
+
+        if not match_len:
+            i += 1
+            continue
+
+        if lazy and match_len < finder.nice_length and i + 1 < n:
+            finder.insert_until(i + 1)
+            next_match = finder.find(i + 1, min(max_length, n - i - 1))
+            if next_match[0] > match_len:
+                # в позиции i остаётся литерал, совпадение из i + 1 проверяется снова
+                pending = next_match
+                i += 1
+                continue
+
+        yield i, match_len, offset
+        i += match_len
+
+
+def _varint_size(value: int) -> int:
+    return (value.bit_length() + 6) // 7 or 1
+
+
+def _token_costs(token_format: int):
+    """Оценка размера токенов в битах: (стоимость литерала, функция стоимости совпадения)"""
+    if token_format == TOKENS_FIXED:
+        return 40, lambda length, offset: 32
+    # литерал — сам байт плюс доля заголовка серии
+    return 9, lambda length, offset: 8 * (_varint_size(((length - MIN_MATCH) << 1) | 1) + _varint_size(offset - 1))
+
+
+def _parse_optimal(finder: HashChain, n: int, max_length: int, token_format: int, start: int = 0, stop: int = None):
+    """
+    Оптимальный разбор: для каждого куска OPTIMAL_SEGMENT ищется последовательность литералов и совпадений
+    с минимальной суммарной оценкой размера (кратчайший путь вперёд по позициям).
+    Совпадение не короче nice_length берётся сразу, без перебора промежуточных позиций.
+    Разбираются позиции [start, stop), совпадения не выходят за stop.
+    """
+    literal_cost, match_cost = _token_costs(token_format)
+    nice_length = finder.nice_length
+    stop = n if stop is None else stop
+
+    for seg_start in range(start, stop, OPTIMAL_SEGMENT):
+        seg_end = min(stop, seg_start + OPTIMAL_SEGMENT)
+        size = seg_end - seg_start
+        price = [0] + [float('inf')] * size
+        step_len = [1] * (size + 1)
+        step_off = [0] * (size + 1)
+
+        k = 0
+        while k < size:
+            pos = seg_start + k
+            base = price[k]
+            if base + literal_cost < price[k + 1]:
+                price[k + 1] = base + literal_cost
+                step_len[k + 1] = 1
+                step_off[k + 1] = 0
+
+            finder.insert_until(pos)
+            matches = finder.find_all(pos, min(max_length, seg_end - pos))
+            if matches and matches[-1][0] >= nice_length:
+                length, offset = matches[-1]
+                cost = base + match_cost(length, offset)
+                if cost < price[k + length]:
+                    price[k + length] = cost
+                    step_len[k + length] = length
+                    step_off[k + length] = offset
+                k += length
+                continue
+
+            shorter = MIN_MATCH - 1
+            for length, offset in matches:
+                for candidate_len in range(shorter + 1, length + 1):
+                    cost = base + match_cost(candidate_len, offset)
+                    if cost < price[k + candidate_len]:
+                        price[k + candidate_len] = cost
+                        step_len[k + candidate_len] = candidate_len
+                        step_off[k + candidate_len] = offset
+                shorter = length
+            k += 1
+
+        steps = []
+        k = size
+        while k > 0:
+            if step_off[k]:
+                steps.append((seg_start + k - step_len[k], step_len[k], step_off[k]))
+            k -= step_len[k]
+        yield from reversed(steps)
+
+
+def _put_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def lz77_compress(data: bytes, buffer_size: int = 65536, max_length: int = 4096, show_progress: bool = True,
+                  level: int = DEFAULT_LEVEL, token_format: int = TOKENS_VARINT) -> bytes:
+    """
+    LZ77 компрессия с поиском совпадений по цепочкам хэшей
+    :param buffer_size: размер окна
+    :param max_length: максимальная длина совпадения
+    :param level: уровень сжатия 1..9: 1-3 — жадный разбор, 4-7 — ленивый, 8-9 — оптимальный
+    :param token_format: TOKENS_VARINT или старый TOKENS_FIXED (окно и длина не больше MAX_FIXED_VALUE)
+    """
+    if token_format == TOKENS_FIXED:
+        if buffer_size > MAX_FIXED_VALUE or max_length > MAX_FIXED_VALUE:
+            raise ValueError(f"В формате TOKENS_FIXED окно и длина не больше {MAX_FIXED_VALUE}")
+    elif token_format != TOKENS_VARINT:
+        raise ValueError(f"Неизвестный формат токенов: {token_format}")
+    if buffer_size <= 0:
+        raise ValueError(f"Размер окна должен быть положительным: {buffer_size}")
+    if level not in LEVELS:
+        raise ValueError(f"Неизвестный уровень сжатия: {level}")
+
+    max_chain, nice_length, strategy = LEVELS[level]
+    finder = HashChain(data, buffer_size, max_chain, nice_length)
     n = len(data)
+    if strategy == OPTIMAL:
+        matches = _parse_optimal(finder, n, max_length, token_format)
+    else:
+        matches = _parse_greedy(finder, n, max_length, lazy=strategy == LAZY)
+
+    varint = token_format == TOKENS_VARINT
+    encoded_data = bytearray()
+    literal_start = 0
     last_update = 0
 
     if show_progress:
         print("Сжатие данных...")
 
-    while i < n:
+    for i, match_len, offset in matches:
         if show_progress and time.time() - last_update > 0.1:
             print_progress(i, n, prefix='Прогресс:', suffix=f'Обработано {i}/{n} байт')
             last_update = time.time()
 
-        search_start = max(0, i - buffer_size)
-        search_end = i
-        max_match_length = 0
-        best_offset = 0
+        if varint:
+            if literal_start < i:
+                _put_varint(encoded_data, (i - literal_start) << 1)
+                encoded_data += data[literal_start:i]
+            _put_varint(encoded_data, ((match_len - MIN_MATCH) << 1) | 1)
+            _put_varint(encoded_data, offset - 1)
+        else:
+            for byte in data[literal_start:i]:
+                encoded_data.extend((0, 0, 0, 0, byte))
+            encoded_data.append((offset >> 8) & 0xFF)
+            encoded_data.append(offset & 0xFF)
+            encoded_data.append((match_len >> 8) & 0xFF)
+            encoded_data.append(match_len & 0xFF)
+        literal_start = i + match_len
 
-        max_possible_length = min(max_length, n - i)
-        lookahead = min(4, max_possible_length)
-        substring_start = data[i:i + lookahead]
+    if literal_start < n:
+        if varint:
+            _put_varint(encoded_data, (n - literal_start) << 1)
+            encoded_data += data[literal_start:n]
+        else:
+            for byte in data[literal_start:n]:
+                encoded_data.extend((0, 0, 0, 0, byte))
 
-        pos = data.rfind(substring_start, search_start, search_end)
+    if show_progress:
+        print_progress(n, n, prefix='Прогресс:', suffix=f'Обработано {n}/{n} байт')
+        print(f"Сжатие завершено. Размер сжатых данных: {len(encoded_data)} байт")
 
-        if pos != -1:
-            offset = search_end - pos
-            match_length = lookahead
+    return bytes(encoded_data)
 
-            while (match_length < max_possible_length and
-                   i + match_length < n and
-                   data[pos + (match_length % (search_end - pos))] == data[i + match_length]):
-                match_length += 1
 
-            if match_length > max_match_length:
-                max_match_length = match_length
-                best_offset = offset
+class LZ77Stream:
+    """
+    Потоковое сжатие LZ77 в формате TOKENS_VARINT: данные подаются кусками через compress,
+    в памяти остаются только окно (меньше двух buffer_size байт) и ещё не разобранный хвост,
+    а цепочки хэшей живут между вызовами, так что каждый байт вставляется в них один раз.
+    Последние max_length байт куска не разбираются до следующего вызова, чтобы совпадения не обрывались
+    на границе кусков. Смещения могут указывать в предыдущие куски, поэтому распаковывать блоки токенов
+    нужно по порядку через LZ77StreamDecoder с тем же buffer_size.
+    """
+
+    def __init__(self, buffer_size: int = 65536, max_length: int = 4096, level: int = DEFAULT_LEVEL):
+        if buffer_size <= 0:
+            raise ValueError(f"Размер окна должен быть положительным: {buffer_size}")
+        if level not in LEVELS:
+            raise ValueError(f"Неизвестный уровень сжатия: {level}")
+
+        self.buffer_size = buffer_size
+        self.max_length = max_length
+        self.level = level
+        self.buffer = bytearray()  # окно, затем ещё не разобранные байты
+        self.pos = 0  # начало неразобранной части в buffer
+        self.finder = None  # позиции в цепочках — индексы в buffer
 
-        if max_match_length > 0:
-            encoded_data.append((best_offset >> 8) & 0xFF)
-            encoded_data.append(best_offset & 0xFF)
-            encoded_data.append((max_match_length >> 8) & 0xFF)
-            encoded_data.append(max_match_length & 0xFF)
-            i += max_match_length
+    def compress(self, chunk: bytes, final: bool = False) -> bytes:
+        """
+        Добавляет кусок и разбирает всё, что можно, не дожидаясь следующих кусков
+        :param final: кусок последний — разобрать всё до конца
+        :return: блок токенов (может быть пустым)
+        """
+        self.buffer += chunk
+        n = len(self.buffer)
+        stop = n if final else n - self.max_length
+        if stop <= self.pos:
+            return b""
+
+        data = bytes(self.buffer)
+        max_chain, nice_length, strategy = LEVELS[self.level]
+        if self.finder is None:
+            self.finder = HashChain(data, self.buffer_size, max_chain, nice_length)
+        finder = self.finder
+        finder.data = data
+        if strategy == OPTIMAL:
+            matches = _parse_optimal(finder, n, self.max_length, TOKENS_VARINT, start=self.pos, stop=stop)
         else:
-            encoded_data.extend([0, 0, 0, 0])
-            encoded_data.append(data[i])
-            i += 1
+            matches = _parse_greedy(finder, n, self.max_length, lazy=strategy == LAZY, start=self.pos, stop=stop)
 
-    if show_progress:
-        print_progress(n, n, prefix='Прогресс:', suffix=f'Обработано {n}/{n} байт')
-        print(f"Сжатие завершено. Размер сжатых данных: {len(encoded_data)} байт")
+        encoded_data = bytearray()
+        literal_start = self.pos
+        for i, match_len, offset in matches:
+            if literal_start < i:
+                _put_varint(encoded_data, (i - literal_start) << 1)
+                encoded_data += data[literal_start:i]
+            _put_varint(encoded_data, ((match_len - MIN_MATCH) << 1) | 1)
+            _put_varint(encoded_data, offset - 1)
+            literal_start = i + match_len
 
-    return bytes(encoded_data)
+        if literal_start < stop:
+            _put_varint(encoded_data, (stop - literal_start) << 1)
+            encoded_data += data[literal_start:stop]
+            literal_start = stop
 
+        # от разобранного остаётся окно; отрезается кратное размеру prev, чтобы сдвиг цепочек был простым вычитанием
+        keep_from = max(0, literal_start - self.buffer_size)
+        keep_from -= keep_from & finder.mask
+        if keep_from:
+            del self.buffer[:keep_from]
+            finder.shift(keep_from)
+        self.pos = literal_start - keep_from
 
-def lz77_decompress(encoded_data: bytes, show_progress: bool = True) -> bytes:
-    decoded_data = bytearray()
+        return bytes(encoded_data)
+
+    def flush(self) -> bytes:
+        """Разбирает остаток; после этого поток закончен"""
+        return self.compress(b"", final=True)
+
+
+class LZ77StreamDecoder:
+    """Распаковка блоков токенов LZ77Stream по порядку; между блоками хранится только окно из buffer_size байт"""
+
+    def __init__(self, buffer_size: int = 65536):
+        self.buffer_size = buffer_size
+        self.window = bytearray()
+
+    def decompress(self, tokens: bytes) -> bytes:
+        decoded_data = bytearray(self.window)
+        _decode_varint_tokens(bytes(tokens), decoded_data, None)
+        output = bytes(decoded_data[len(self.window):])
+        self.window = decoded_data[-self.buffer_size:]
+        return output
+
+
+def _copy_match(decoded_data: bytearray, offset: int, length: int):
+    start = len(decoded_data) - offset
+    if offset <= 0 or start < 0:
+        raise ValueError(f"Invalid offset: {offset}")
+
+    if offset >= length:
+        decoded_data += decoded_data[start:start + length]
+    else:
+        # перекрывающееся совпадение — это повторение последних offset байт
+        period = decoded_data[start:]
+        repeats, rest = divmod(length, offset)
+        decoded_data += period * repeats
+        decoded_data += period[:rest]
+
+
+def _decode_varint_tokens(data: bytes, decoded_data: bytearray, progress, limit: int = sys.maxsize):
+    view = memoryview(data)
     i = 0
-    n = len(encoded_data)
-    last_update = 0
+    n = len(data)
+    tokens = 0
 
-    if show_progress:
-        print("Распаковка данных...")
+    while i < n:
+        tokens += 1
+        if progress and not tokens & 0xFFF:
+            progress(i)
+
+        # varint разбирается на месте: вызов функции на каждый токен заметно дороже самого разбора
+        value = data[i]
+        i += 1
+        if value >= 0x80:
+            value &= 0x7F
+            shift = 7
+            while True:
+                byte = data[i]
+                i += 1
+                value |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+
+        if value & 1:
+            offset = data[i]
+            i += 1
+            if offset >= 0x80:
+                offset &= 0x7F
+                shift = 7
+                while True:
+                    byte = data[i]
+                    i += 1
+                    offset |= (byte & 0x7F) << shift
+                    if byte < 0x80:
+                        break
+                    shift += 7
+            offset += 1
+            length = (value >> 1) + MIN_MATCH
+            if len(decoded_data) + length > limit:
+                raise ValueError(f"Распакованные данные больше {limit} байт")
+            start = len(decoded_data) - offset
+            if offset >= length and start >= 0:
+                decoded_data += decoded_data[start:start + length]
+            else:
+                _copy_match(decoded_data, offset, length)
+        else:
+            run = value >> 1
+            if i + run > n:
+                raise ValueError("Обрезанная серия литералов")
+            decoded_data += view[i:i + run]
+            i += run
+
+
+def _decode_fixed_tokens(data: bytes, decoded_data: bytearray, progress, limit: int = sys.maxsize):
+    i = 0
+    n = len(data)
+    tokens = 0
 
     while i + 4 <= n:
-        if show_progress and time.time() - last_update > 0.1:
-            print_progress(i, n, prefix='Прогресс:', suffix=f'Обработано {i}/{n} байт')
-            last_update = time.time()
+        tokens += 1
+        if progress and not tokens & 0xFFF:
+            progress(i)
 
-        offset = (encoded_data[i] << 8) | encoded_data[i + 1]
-        length = (encoded_data[i + 2] << 8) | encoded_data[i + 3]
+        offset = (data[i] << 8) | data[i + 1]
+        length = (data[i + 2] << 8) | data[i + 3]
         i += 4
 
         if offset == 0 and length == 0:
             if i >= n:
                 break
-            decoded_data.append(encoded_data[i])
+            decoded_data.append(data[i])
             i += 1
         else:
-            start = len(decoded_data) - offset
-            end = start + length
+            if len(decoded_data) + length > limit:
+                raise ValueError(f"Распакованные данные больше {limit} байт")
+            _copy_match(decoded_data, offset, length)
+
+
+def lz77_decompress(encoded_data: bytes, show_progress: bool = True, token_format: int = TOKENS_VARINT,
+                    max_size: int = None) -> bytes:
+    """
+    LZ77 декомпрессия для обоих форматов токенов.
+    Серии литералов копируются через memoryview без промежуточных срезов, совпадения — одним блоком,
+    перекрывающиеся совпадения — повторением периода.
+    :param max_size: предел размера выхода: совпадение из испорченных токенов не раздувается в памяти
+    """
+    if token_format == TOKENS_VARINT:
+        decode_tokens = _decode_varint_tokens
+    elif token_format == TOKENS_FIXED:
+        decode_tokens = _decode_fixed_tokens
+    else:
+        raise ValueError(f"Неизвестный формат токенов: {token_format}")
 
-            if start < 0 or start >= len(decoded_data):
-                raise ValueError(f"Invalid offset: {offset}")
+    data = bytes(encoded_data)
+    n = len(data)
+    decoded_data = bytearray()
+    progress = None
+
+    if show_progress:
+        print("Распаковка данных...")
+
+        def progress(i):
+            print_progress(i, n, prefix='Прогресс:', suffix=f'Обработано {i}/{n} байт')
 
-            decoded_data.extend(decoded_data[start:end])
+    decode_tokens(data, decoded_data, progress, sys.maxsize if max_size is None else max_size)
 
     if show_progress:
         print_progress(n, n, prefix='Прогресс:', suffix=f'Обработано {n}/{n} байт')
         print(f"Распаковка завершена. Размер данных: {len(decoded_data)} байт")
 
-    return bytes(decoded_data)
\ No newline at end of file
+    return bytes(decoded_data)
@@ -1,41 +1,205 @@
-def lz78_compress(data: bytes) -> bytes:
-    dictionary = {b'': 0}
-    current_string = b''
+from compressing_algorithms.bitio import BitReader, BitWriter
+
+RESET = 'reset'  # заполненный словарь очищается и строится заново
+FREEZE = 'freeze'  # заполненный словарь больше не пополняется
+
+DEFAULT_MAX_DICT_SIZE = 1 << 20  # не больше миллиона фраз, индекс помещается в 4 байта
+
+LZW_CLEAR = 256  # код сброса словаря
+LZW_FIRST_CODE = 257  # первый код фразы; 0..255 — одиночные байты
+LZW_MIN_BITS = 9
+LZW_MAX_BITS = 16
+
+
+def lz78_compress(data: bytes, max_dict_size: int = DEFAULT_MAX_DICT_SIZE, policy: str = RESET) -> bytes:
+    """
+    LZ78 компрессия с выводом (index, byte) пар.
+    Словарь — префиксное дерево на целых числах: ключ (узел << 8) | байт, значение — номер дочернего узла,
+    поэтому фразы как bytes не строятся и не хранятся.
+    :param max_dict_size: максимальное число фраз в словаре (None — без ограничения)
+    :param policy: что делать с заполненным словарём: RESET или FREEZE
+    """
+    if policy not in (RESET, FREEZE):
+        raise ValueError(f"Неизвестная политика словаря: {policy}")
+
+    children = {}
+    next_code = 1
+    node = 0
     compressed_data = bytearray()
 
     for byte in data:
-        new_string = current_string + bytes([byte])
-        if new_string in dictionary:
-            current_string = new_string
-        else:
-            compressed_data.extend(dictionary[current_string].to_bytes(4, 'big'))
-            compressed_data.append(byte)
-            dictionary[new_string] = len(dictionary)
-            current_string = b''
+        key = (node << 8) | byte
+        child = children.get(key)
+        if child is not None:
+            node = child
+            continue
 
-    if current_string:
-        compressed_data.extend(dictionary[current_string].to_bytes(4, 'big'))
+        compressed_data += node.to_bytes(4, 'big')
+        compressed_data.append(byte)
+        if max_dict_size is None or next_code < max_dict_size:
+            children[key] = next_code
+            next_code += 1
+        elif policy == RESET:
+            children.clear()
+            next_code = 1
+        node = 0
+
+    if node:
+        compressed_data += node.to_bytes(4, 'big')
 
     return bytes(compressed_data)
 
-def lz78_decompress(compressed_data: bytes) -> bytes:
-    dictionary = {0: b''}
+
+def lz78_decompress(compressed_data: bytes, max_dict_size: int = DEFAULT_MAX_DICT_SIZE, policy: str = RESET,
+                    max_size: int = None) -> bytes:
+    """
+    LZ78 декомпрессия (index, byte) пар.
+    Каждая фраза уже записана в выход, поэтому для неё хранится только (начало, длина) в выходе,
+    и восстановление фразы — один срез. Параметры словаря должны совпадать с параметрами сжатия.
+    :param max_size: предел размера выхода: испорченные данные не раздуваются в памяти
+    """
+    if policy not in (RESET, FREEZE):
+        raise ValueError(f"Неизвестная политика словаря: {policy}")
+
+    starts = [0]
+    lengths = [0]
     decompressed_data = bytearray()
     i = 0
+    n = len(compressed_data)
 
-    while i < len(compressed_data):
+    while i < n:
         index = int.from_bytes(compressed_data[i:i + 4], 'big')
         i += 4
-        byte = compressed_data[i] if i < len(compressed_data) else None
-        i += 1 if byte is not None else 0
+        if index >= len(starts):
+            raise ValueError(f"Invalid index: {index}")
+
+        start = len(decompressed_data)
+        length = lengths[index]
+        # за фразой идёт байт, если данные не кончились
+        if max_size is not None and start + length + (i < n) > max_size:
+            raise ValueError(f"Распакованные данные больше {max_size} байт")
+        phrase_start = starts[index]
+        decompressed_data += decompressed_data[phrase_start:phrase_start + length]
+
+        if i >= n:
+            break
+
+        decompressed_data.append(compressed_data[i])
+        i += 1
+        if max_dict_size is None or len(starts) < max_dict_size:
+            starts.append(start)
+            lengths.append(length + 1)
+        elif policy == RESET:
+            del starts[1:]
+            del lengths[1:]
+
+    return bytes(decompressed_data)
+
+
+def _lzw_width(next_code: int, max_bits: int) -> int:
+    return max(LZW_MIN_BITS, min(max_bits, next_code.bit_length()))
+
 
-        string = dictionary[index]
+def lzw_compress(data: bytes, max_bits: int = LZW_MAX_BITS) -> bytes:
+    """
+    LZW компрессия: только коды фраз, без отдельного байта.
+    Ширина кода растёт вместе со словарём от 9 до max_bits бит; когда словарь заполнен,
+    пишется LZW_CLEAR и словарь строится заново.
+    """
+    if not LZW_MIN_BITS <= max_bits <= 24:
+        raise ValueError(f"Ширина кода должна быть от {LZW_MIN_BITS} до 24 бит: {max_bits}")
 
-        if byte is not None:
-            new_string = string + bytes([byte])
-            dictionary[len(dictionary)] = new_string
-            decompressed_data.extend(new_string)
+    max_code = 1 << max_bits
+    writer = BitWriter()
+    children = {}
+    next_code = LZW_FIRST_CODE
+    node = -1
+
+    for byte in data:
+        if node < 0:
+            node = byte
+            continue
+
+        key = (node << 8) | byte
+        child = children.get(key)
+        if child is not None:
+            node = child
+            continue
+
+        # декодер отстаёт от кодера на одну фразу, поэтому ширина считается по next_code - 1
+        width = _lzw_width(next_code - 1, max_bits)
+        writer.write(node, width)
+        if next_code < max_code:
+            children[key] = next_code
+            next_code += 1
+        else:
+            writer.write(LZW_CLEAR, width)
+            children.clear()
+            next_code = LZW_FIRST_CODE
+        node = byte
+
+    if node >= 0:
+        writer.write(node, _lzw_width(next_code - 1, max_bits))
+    writer.flush()
+
+    return writer.getvalue()
+
+
+def lzw_decompress(compressed_data: bytes, max_bits: int = LZW_MAX_BITS, max_size: int = None) -> bytes:
+    """
+    LZW декомпрессия; фразы, как и в lz78_decompress, хранятся как (начало, длина) в выходе
+    :param max_size: предел размера выхода: испорченные данные не раздуваются в памяти
+    """
+    max_code = 1 << max_bits
+    reader = BitReader(compressed_data)
+    starts = []
+    lengths = []
+    decompressed_data = bytearray()
+    next_code = LZW_FIRST_CODE
+    prev_start = -1
+    prev_length = 0
+
+    while True:
+        width = _lzw_width(next_code, max_bits)
+        if reader.bits_left < width:
+            break
+        code = reader.read(width)
+
+        if code == LZW_CLEAR:
+            starts.clear()
+            lengths.clear()
+            next_code = LZW_FIRST_CODE
+            prev_start = -1
+            continue
+
+        start = len(decompressed_data)
+        if code < LZW_CLEAR:
+            length = 1
+        elif code - LZW_FIRST_CODE < len(starts):
+            length = lengths[code - LZW_FIRST_CODE]
+        elif code == next_code and prev_start >= 0:
+            length = prev_length + 1
+        else:
+            raise ValueError(f"Invalid code: {code}")
+        if max_size is not None and start + length > max_size:
+            raise ValueError(f"Распакованные данные больше {max_size} байт")
+
+        if code < LZW_CLEAR:
+            decompressed_data.append(code)
+        elif code - LZW_FIRST_CODE < len(starts):
+            phrase_start = starts[code - LZW_FIRST_CODE]
+            decompressed_data += decompressed_data[phrase_start:phrase_start + length]
         else:
-            decompressed_data.extend(string)
+            # фраза ещё не в словаре: предыдущая фраза плюс её же первый байт
+            decompressed_data += decompressed_data[prev_start:prev_start + prev_length]
+            decompressed_data.append(decompressed_data[prev_start])
+
+        if prev_start >= 0 and next_code < max_code:
+            # предыдущая фраза и первый байт текущей лежат в выходе подряд
+            starts.append(prev_start)
+            lengths.append(prev_length + 1)
+            next_code += 1
+        prev_start = start
+        prev_length = length
 
-    return bytes(decompressed_data)
\ No newline at end of file
+    return bytes(decompressed_data)
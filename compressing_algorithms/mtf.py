@@ -1,24 +1,74 @@
+import numpy as np
+
+
+def _run_heads(values: np.ndarray) -> np.ndarray:
+    """Позиции, с которых начинаются серии одинаковых значений"""
+    heads = np.empty(len(values), dtype=bool)
+    heads[:1] = True
+    np.not_equal(values[1:], values[:-1], out=heads[1:])
+    return np.flatnonzero(heads)
+
+
 def mtf_compress(data: bytes) -> bytes:
-    alphabet = list(range(256))
-    result = bytearray()
+    """
+    MTF сразу по всему блоку. Внутри серии одинаковых байт индекс всегда 0 и алфавит не меняется,
+    поэтому в цикле обрабатываются только начала серий, а нули заполняет NumPy.
+    Алфавит — bytearray: поиск и сдвиг выполняются срезами на C, без pop/insert списка.
+    """
+    if not data:
+        return b""
+
+    values = np.frombuffer(data, dtype=np.uint8)
+    heads = _run_heads(values)
+    head_bytes = values[heads].tolist()
 
-    for byte in data:
+    alphabet = bytearray(range(256))
+    indices = bytearray(len(head_bytes))
+
+    for k, byte in enumerate(head_bytes):
+        if alphabet[1] == byte:
+            # частый после BWT случай: возврат к предыдущему символу
+            alphabet[0], alphabet[1] = byte, alphabet[0]
+            indices[k] = 1
+            continue
         index = alphabet.index(byte)
-        result.append(index)
-        alphabet.pop(index)
-        alphabet.insert(0, byte)
+        alphabet[1:index + 1] = alphabet[:index]
+        alphabet[0] = byte
+        indices[k] = index
 
-    return bytes(result)
+    result = np.zeros(len(values), dtype=np.uint8)
+    result[heads] = np.frombuffer(indices, dtype=np.uint8)
+    return result.tobytes()
 
 
 def mtf_decompress(compressed_data: bytes) -> bytes:
-    alphabet = list(range(256))
-    result = bytearray()
+    """
+    Обратное MTF: индекс 0 повторяет предыдущий байт, поэтому в цикле разбираются только ненулевые индексы,
+    а повторы протягиваются вперёд через maximum.accumulate.
+    """
+    if not compressed_data:
+        return b""
+
+    indices = np.frombuffer(compressed_data, dtype=np.uint8)
+    nonzero = np.flatnonzero(indices)
 
-    for index in compressed_data:
+    alphabet = bytearray(range(256))
+    head_bytes = bytearray(len(nonzero))
+
+    for k, index in enumerate(indices[nonzero].tolist()):
         byte = alphabet[index]
-        result.append(byte)
-        alphabet.pop(index)
-        alphabet.insert(0, byte)
+        if index == 1:
+            alphabet[1] = alphabet[0]
+        else:
+            alphabet[1:index + 1] = alphabet[:index]
+        alphabet[0] = byte
+        head_bytes[k] = byte
+
+    # для каждой позиции — последняя позиция с ненулевым индексом (или -1, если её ещё не было)
+    last = np.full(len(indices), -1, dtype=np.int64)
+    last[nonzero] = nonzero
+    np.maximum.accumulate(last, out=last)
 
-    return bytes(result)
\ No newline at end of file
+    result = np.zeros(len(indices) + 1, dtype=np.uint8)  # result[-1] = 0 — начальный первый символ алфавита
+    result[nonzero] = np.frombuffer(head_bytes, dtype=np.uint8)
+    return result[last].tobytes()
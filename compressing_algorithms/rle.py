@@ -1,41 +1,211 @@
+import numpy as np
+
+LITERAL_MARKER = 0x80  # второй байт группы: за ним идут count байт как есть
+MAX_COUNT = 255
+
+RLE_FIXED = 1  # формат rle_compress: счётчики в байт, маркер 0x80 (серию байта 0x80 не отличить от группы)
+RLE_VARINT = 2  # формат rle_compress_varint: счётчики varint, флаг серии в младшем бите заголовка
+MIN_RUN = 3  # серия короче не окупает свой заголовок и разрыв группы литералов
+
+
+def _segments(mask: np.ndarray):
+    """Начала и длины непрерывных участков, где mask истинна"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+    return edges[0::2], edges[1::2] - edges[0::2]
+
+
+def _split(starts: np.ndarray, lengths: np.ndarray, limit: int):
+    """Режет участки на куски не длиннее limit, с начала участка"""
+    pieces = (lengths + limit - 1) // limit
+    first = np.repeat(np.cumsum(pieces) - pieces, pieces)
+    index_in_run = np.arange(int(pieces.sum())) - first
+    piece_starts = np.repeat(starts, pieces) + index_in_run * limit
+    piece_lengths = np.minimum(np.repeat(lengths, pieces) - index_in_run * limit, limit)
+    return piece_starts, piece_lengths
+
+
 def rle_compress(data: bytes) -> bytes:
-    encoded = []
+    """
+    RLE: серия из 2..255 одинаковых байт — пара (count, byte); одиночные байты подряд —
+    группа (count, LITERAL_MARKER, байты...) не длиннее 255.
+    Серии ищутся сразу по всему входу через np.diff, длинные серии режутся по 255, остаток в один байт
+    становится одиночным; группы и их смещения в выходе считаются без цикла по байтам.
+    """
+    values = np.frombuffer(data, dtype=np.uint8)
+    n = len(values)
+    if not n:
+        return b""
+
+    run_starts = np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))
+    run_lengths = np.diff(np.append(run_starts, n))
+    piece_starts, piece_lengths = _split(run_starts, run_lengths, MAX_COUNT)
+
+    single = piece_lengths == 1
+    repeat_starts = piece_starts[~single]
+    repeat_lengths = piece_lengths[~single]
+
+    # одиночные байты подряд занимают непрерывный участок входа
+    single_mask = np.zeros(n, dtype=bool)
+    single_mask[piece_starts[single]] = True
+    literal_starts, literal_lengths = _split(*_segments(single_mask), MAX_COUNT)
+
+    # токены в порядке входа: у серии 2 байта выхода, у группы 2 + длина
+    token_starts = np.concatenate((repeat_starts, literal_starts))
+    token_sizes = np.concatenate((np.full(len(repeat_starts), 2), literal_lengths + 2))
+    order = np.argsort(token_starts, kind='stable')
+    offsets = np.empty(len(order), dtype=np.int64)
+    offsets[order] = np.cumsum(token_sizes[order]) - token_sizes[order]
+
+    output = np.empty(int(token_sizes.sum()), dtype=np.uint8)
+    repeat_offsets = offsets[:len(repeat_starts)]
+    output[repeat_offsets] = repeat_lengths
+    output[repeat_offsets + 1] = values[repeat_starts]
+
+    literal_offsets = offsets[len(repeat_starts):]
+    output[literal_offsets] = literal_lengths
+    output[literal_offsets + 1] = LITERAL_MARKER
+    literal_positions = np.flatnonzero(single_mask)
+    output[literal_positions + np.repeat(literal_offsets + 2 - literal_starts, literal_lengths)] = values[literal_positions]
+
+    return output.tobytes()
+
+
+def rle_decompress(data: bytes) -> bytes:
+    """
+    Обратное к rle_compress. Разбор заголовков последовательный, но на токен приходится одна итерация:
+    для каждого байта выхода считается индекс во входе, и выход собирается одной выборкой.
+    """
+    n = len(data)
+    sources = []
+    counts = []
+    literals = []
     i = 0
-    while i < len(data):
-        run_length = 1
-        while i + run_length < len(data) and data[i] == data[i + run_length] and run_length < 255:
-            run_length += 1
-
-        if run_length > 1:
-            encoded.append(run_length)
-            encoded.append(data[i])
-            i += run_length
+
+    while i < n:
+        if i + 1 >= n:
+            raise ValueError("Обрезанные данные RLE")
+        count = data[i]
+        if data[i + 1] == LITERAL_MARKER:
+            # как и срез в прежнем декодере, обрезанная группа отдаёт только то, что есть
+            count = min(count, n - i - 2)
+            sources.append(i + 2)
+            literals.append(True)
+            i += 2 + count
         else:
-            non_repeat_length = 1
-            while (i + non_repeat_length < len(data) and
-                   non_repeat_length < 255 and
-                   (i + non_repeat_length + 1 >= len(data) or
-                    data[i + non_repeat_length] != data[i + non_repeat_length + 1])):
-                non_repeat_length += 1
-
-            encoded.append(non_repeat_length)
-            encoded.append(0x80)
-            encoded.extend(data[i:i + non_repeat_length])
-            i += non_repeat_length
+            sources.append(i + 1)
+            literals.append(False)
+            i += 2
+        counts.append(count)
+
+    counts = np.array(counts, dtype=np.int64)
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    step = np.repeat(np.array(literals, dtype=np.int64), counts)
+    # серия повторяет один байт входа, группа идёт по входу подряд
+    index = np.repeat(np.array(sources, dtype=np.int64), counts) + (np.arange(len(first)) - first) * step
+
+    return np.frombuffer(data, dtype=np.uint8)[index].tobytes()
+
+
+def _put_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def rle_compress_varint(data: bytes) -> bytes:
+    """
+    RLE без ограничения длины серии. Заголовок токена — varint:
+    ((длина - MIN_RUN) << 1) | 1 и один байт для серии, (длина - 1) << 1 и сами байты для группы литералов.
+    Флаг в заголовке, а не в данных, поэтому формат однозначен для любого входа.
+    """
+    values = np.frombuffer(data, dtype=np.uint8)
+    n = len(values)
+    if not n:
+        return b""
+
+    run_starts = np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))
+    run_lengths = np.diff(np.append(run_starts, n))
+    long_runs = run_lengths >= MIN_RUN
+    run_starts = run_starts[long_runs].tolist()
+    run_lengths = run_lengths[long_runs].tolist()
+
+    encoded = bytearray()
+    literal_start = 0
+    for start, length in zip(run_starts, run_lengths):
+        if start > literal_start:
+            _put_varint(encoded, (start - literal_start - 1) << 1)
+            encoded += data[literal_start:start]
+        _put_varint(encoded, ((length - MIN_RUN) << 1) | 1)
+        encoded.append(data[start])
+        literal_start = start + length
+
+    if literal_start < n:
+        _put_varint(encoded, (n - literal_start - 1) << 1)
+        encoded += data[literal_start:]
 
     return bytes(encoded)
 
 
-def rle_decompress(data: bytes) -> bytes:
-    decoded = []
+def rle_decompress_varint(data: bytes, max_size: int = None) -> bytes:
+    """
+    Обратное к rle_compress_varint: одна итерация на серию или группу литералов
+    :param max_size: предел размера выхода: серия из испорченных данных не раздувается в памяти
+    """
+    view = memoryview(data)
+    decoded = bytearray()
     i = 0
-    while i < len(data):
-        run_length = data[i]
-        if i + 1 < len(data) and data[i + 1] == 0x80:
-            length = run_length
-            decoded.extend(data[i + 2:i + 2 + length])
-            i += 2 + length
+    n = len(data)
+
+    while i < n:
+        value = data[i]
+        i += 1
+        if value >= 0x80:
+            value &= 0x7F
+            shift = 7
+            while True:
+                if i >= n:
+                    raise ValueError("Обрезанные данные RLE")
+                byte = data[i]
+                i += 1
+                value |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+
+        if i >= n:
+            raise ValueError("Обрезанные данные RLE")
+        if value & 1:
+            run = (value >> 1) + MIN_RUN
+            if max_size is not None and len(decoded) + run > max_size:
+                raise ValueError(f"Распакованные данные больше {max_size} байт")
+            decoded += bytes((data[i],)) * run
+            i += 1
         else:
-            decoded.extend([data[i + 1]] * run_length)
-            i += 2
-    return bytes(decoded)
\ No newline at end of file
+            length = (value >> 1) + 1
+            if i + length > n:
+                raise ValueError("Обрезанные данные RLE")
+            decoded += view[i:i + length]
+            i += length
+
+    return bytes(decoded)
+
+
+def rle_pack(data: bytes, version: int = RLE_VARINT) -> bytes:
+    """RLE с байтом версии формата впереди, чтобы rle_unpack не зависел от параметров сжатия"""
+    if version == RLE_VARINT:
+        return bytes([version]) + rle_compress_varint(data)
+    if version == RLE_FIXED:
+        return bytes([version]) + rle_compress(data)
+    raise ValueError(f"Неподдерживаемая версия формата: {version}")
+
+
+def rle_unpack(packed: bytes) -> bytes:
+    if not packed:
+        raise ValueError("Нет байта версии формата RLE")
+    version = packed[0]
+    if version == RLE_VARINT:
+        return rle_decompress_varint(packed[1:])
+    if version == RLE_FIXED:
+        return rle_decompress(packed[1:])
+    raise ValueError(f"Неподдерживаемая версия формата: {version}")
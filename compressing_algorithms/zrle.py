@@ -0,0 +1,86 @@
+from array import array
+
+import numpy as np
+
+RUNA = 0  # цифра 1 длины серии нулей
+RUNB = 1  # цифра 2 длины серии нулей
+EOB = 257  # конец блока; индекс MTF v > 0 кодируется символом v + 1
+ALPHABET_SIZE = 258
+
+_MAX_RUN_DIGITS = 40  # серия из 2^40 нулей заведомо больше любого блока
+
+
+def zrle_compress(data: bytes) -> array:
+    """
+    Кодирование серий нулей после MTF, как в bzip2.
+    Длина серии r записывается в биективной двоичной системе цифрами RUNA (1) и RUNB (2), младшая первой:
+    если r + 1 = 2^k + m, то цифр k, и t-я цифра — RUNB, когда t-й бит m равен 1.
+    Ненулевой индекс v становится символом v + 1, в конце ставится EOB.
+    :return: array('H') символов алфавита из ALPHABET_SIZE символов
+    """
+    values = np.frombuffer(data, dtype=np.uint8)
+    is_zero = np.concatenate(([False], values == 0, [False]))
+    edges = np.flatnonzero(is_zero[1:] != is_zero[:-1])
+    run_starts = edges[0::2]
+    run_lengths = edges[1::2] - run_starts
+
+    # число цифр k = floor(log2(r + 1)) — через длину в битах, без плавающей точки
+    digits = np.zeros(len(run_lengths), dtype=np.int64)
+    remainder = run_lengths + 1
+    while remainder.any():
+        remainder >>= 1
+        digits += remainder > 0
+    m = run_lengths + 1 - (np.int64(1) << digits)
+
+    # сколько символов выхода даёт каждый байт входа: 1 за ненулевой, k за начало серии, 0 за остальные нули
+    counts = (values != 0).astype(np.int64)
+    counts[run_starts] = digits
+    offsets = np.cumsum(counts) - counts
+
+    output = np.empty(int(counts.sum()) + 1, dtype=np.uint16)
+    nonzero = np.flatnonzero(values)
+    output[offsets[nonzero]] = values[nonzero].astype(np.uint16) + 1
+
+    digit_index = np.arange(int(digits.sum())) - np.repeat(np.cumsum(digits) - digits, digits)
+    output[np.repeat(offsets[run_starts], digits) + digit_index] = (np.repeat(m, digits) >> digit_index) & 1
+    output[-1] = EOB
+
+    symbols = array('H')
+    symbols.frombytes(output.tobytes())
+    return symbols
+
+
+def zrle_decompress(symbols, max_size: int = None) -> bytes:
+    """
+    Обратное к zrle_compress
+    :param symbols: последовательность символов, заканчивающаяся EOB
+    :param max_size: предел размера выхода: размер проверяется до того, как серии развёрнуты в памяти
+    """
+    if not len(symbols) or symbols[-1] != EOB:
+        raise ValueError("Поток серий нулей не заканчивается символом EOB")
+
+    symbols = np.asarray(symbols[:-1], dtype=np.int64)
+    if (symbols >= EOB).any():
+        raise ValueError("Символ EOB внутри блока")
+
+    is_run = symbols <= RUNB
+    run_edges = np.concatenate(([False], is_run, [False]))
+    edges = np.flatnonzero(run_edges[1:] != run_edges[:-1])
+    run_starts = edges[0::2]
+    run_lengths = edges[1::2] - run_starts
+    if len(run_lengths) and run_lengths.max() > _MAX_RUN_DIGITS:
+        raise ValueError("Слишком длинная серия нулей")
+
+    # цифра в позиции t серии весит (символ + 1) * 2^t
+    run_positions = np.flatnonzero(is_run)
+    digit_index = run_positions - np.repeat(run_starts, run_lengths)
+    weights = (symbols[run_positions] + 1) << digit_index
+
+    counts = np.where(is_run, 0, 1)
+    if len(run_starts):
+        counts[run_starts] = np.add.reduceat(weights, np.cumsum(run_lengths) - run_lengths)
+    if max_size is not None and counts.sum() > max_size:
+        raise ValueError(f"Распакованные данные больше {max_size} байт")
+    values = np.where(is_run, 0, symbols - 1).astype(np.uint8)
+
+    return np.repeat(values, counts).tobytes()
@@ -0,0 +1,185 @@
+import asyncio
+import io
+import os
+import weakref
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from compressors import pipeline
+from util import block_index
+
+
+def _encode_block(spec, block):
+    # в процессе пула конвейер создаётся один раз на спецификацию (pipeline.get_pipeline)
+    return pipeline.get_pipeline(spec).encode_block(block)
+
+
+def _decode_block(spec, record, raw_size=None):
+    # размер проверяется здесь, в процессе пула: испорченная запись не раздувается и не пересылается целиком
+    return pipeline.get_pipeline(spec).decode_block(record, raw_size)
+
+
+def _release(loop, semaphore):
+    """Вызывается в потоке executor, когда задача завершилась"""
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:
+        pass  # цикл уже закрыт, его семафор больше никому не нужен
+
+
+async def _aiter(items):
+    """Обычный или асинхронный итерируемый как асинхронный"""
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+class AsyncCompressor:
+    """
+    asyncio-интерфейс к compressors.pipeline: блоки кодируются в executor, цикл событий не блокируется.
+    Один объект обслуживает любое число одновременных запросов: в executor одновременно не больше
+    max_pending блоков на все запросы одного цикла событий, а каждый запрос держит не больше window готовых,
+    но не отданных записей, поэтому память ограничена при любом числе запросов.
+    Контейнер тот же, что у pipeline.compress_file: compress_bytes и файл дают одинаковые байты.
+    """
+
+    def __init__(self, executor=None, max_pending=None, window=None):
+        """
+        :param executor: executor для блоков (None — общий ProcessPoolExecutor по числу ядер, создаётся при первом вызове)
+        :param max_pending: сколько блоков может быть в executor одновременно (None — два на ядро)
+        :param window: сколько блоков один запрос кодирует впереди отданных (None — как max_pending)
+        """
+        self.executor = executor
+        self.max_pending = max_pending or 2 * (os.cpu_count() or 1)
+        self.window = window or self.max_pending
+        self._own_executor = executor is None
+        # asyncio.Semaphore привязан к циклу событий: у каждого цикла (например, у каждого asyncio.run) свой
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _get_executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor()
+        return self.executor
+
+    async def _submit(self, func, *args):
+        """Задача над блоком; ждёт места в executor, если там уже max_pending блоков"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_pending)
+        await semaphore.acquire()
+        try:
+            work = self._get_executor().submit(func, *args)
+        except BaseException:
+            semaphore.release()
+            raise
+        # слот освобождается, когда задача в executor закончилась (или отменена до запуска), а не когда
+        # отменили asyncio-обёртку: брошенный итератор не должен пускать в executor больше max_pending блоков
+        work.add_done_callback(lambda _: _release(loop, semaphore))
+        return asyncio.wrap_future(work, loop=loop)
+
+    async def _map_ordered(self, func, spec, items, sizes=None):
+        """:param sizes: размеры исходных блоков по порядку, передаются в func третьим аргументом"""
+        pending = deque()
+        sizes = iter(sizes) if sizes is not None else None
+        try:
+            async for item in _aiter(items):
+                if len(pending) >= self.window:
+                    yield await pending.popleft()
+                if isinstance(item, memoryview):
+                    item = bytes(item)
+                args = (spec, item) if sizes is None else (spec, item, next(sizes))
+                pending.append(await self._submit(func, *args))
+
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def compress_blocks(self, blocks, spec=pipeline.DEFAULT_SPEC):
+        """
+        Асинхронный итератор записей блоков по порядку, по мере готовности
+        :param blocks: блоки входа (обычный или асинхронный итерируемый), по pipeline.BLOCK_SIZE для совместимости с файлами
+        """
+        pipeline.get_pipeline(spec)  # неизвестная спецификация — ValueError до начала работы
+        async for record in self._map_ordered(_encode_block, spec, blocks):
+            yield record
+
+    async def decompress_blocks(self, records, spec=pipeline.DEFAULT_SPEC, raw_sizes=None):
+        """
+        Асинхронный итератор исходных блоков по записям из compress_blocks
+        :param raw_sizes: размеры блоков до сжатия по порядку (из индекса блоков): с ними запись, которая
+            распаковывается в другой размер, отвергается ещё в executor
+        """
+        async for block in self._map_ordered(_decode_block, spec, records, raw_sizes):
+            yield block
+
+    async def compress_bytes(self, data, spec=pipeline.DEFAULT_SPEC) -> bytes:
+        """Сжатие data в контейнер pipeline (заголовок со спецификацией, записи блоков, индекс блоков)"""
+        view = memoryview(data)
+        blocks = [view[start:start + pipeline.BLOCK_SIZE] for start in range(0, len(view), pipeline.BLOCK_SIZE)]
+        encoded_spec = spec.encode("ascii")
+
+        output = io.BytesIO()
+        output.write(bytes([pipeline.FORMAT_VERSION, len(encoded_spec)]))
+        output.write(encoded_spec)
+        index = []
+        async for record in self.compress_blocks(blocks, spec):
+            index.append((output.tell(), len(record), len(blocks[len(index)])))
+            output.write(record)
+        block_index.write_index(output, index)
+        return output.getvalue()
+
+    async def decompress_bytes(self, data, max_size=None) -> bytes:
+        """
+        Распаковка контейнера pipeline, в том числе файла из pipeline.compress_file
+        :param max_size: предел размера результата (None — без предела); проверяется по индексу до распаковки
+        """
+        file = io.BytesIO(data)
+        spec = pipeline.read_spec(file)
+        index = block_index.read_index(file)
+        # размеры из индекса проверяются до того, как что-то отправлено в executor; что каждая запись
+        # распаковывается ровно в свой размер, проверяет _decode_block
+        for _, _, raw_size in index:
+            if raw_size > pipeline.BLOCK_SIZE:
+                raise ValueError(f"Блок в индексе больше {pipeline.BLOCK_SIZE} байт: {raw_size}")
+        total_size = sum(raw_size for _, _, raw_size in index)
+        if max_size is not None and total_size > max_size:
+            raise ValueError(f"Распакованные данные больше {max_size} байт: {total_size}")
+        view = memoryview(data)
+
+        output = bytearray()
+        records = (view[offset:offset + size] for offset, size, _ in index)
+        async for block in self.decompress_blocks(records, spec, [raw_size for _, _, raw_size in index]):
+            output += block
+        return bytes(output)
+
+    def close(self):
+        """Останавливает executor, если он создан этим объектом"""
+        if self._own_executor and self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+
+_default = AsyncCompressor()
+
+
+async def compress_bytes(data, spec=pipeline.DEFAULT_SPEC) -> bytes:
+    """Сжатие через общий AsyncCompressor модуля"""
+    return await _default.compress_bytes(data, spec)
+
+
+async def decompress_bytes(data, max_size=None) -> bytes:
+    return await _default.decompress_bytes(data, max_size)
+
+
+def compress_blocks(blocks, spec=pipeline.DEFAULT_SPEC):
+    return _default.compress_blocks(blocks, spec)
+
+
+def decompress_blocks(records, spec=pipeline.DEFAULT_SPEC, raw_sizes=None):
+    return _default.decompress_blocks(records, spec, raw_sizes)
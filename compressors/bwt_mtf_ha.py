@@ -1,166 +1,93 @@
 import time
 import os
 import struct
-import pickle
-import queue
-from collections import defaultdict
 
+from compressing_algorithms import ha
+from compressing_algorithms.bwt import BLOCK_HEADER, bwt_inverse_indexed, bwt_transform_indexed
+from compressing_algorithms.ha import huffman_decompress
+from compressing_algorithms.mtf import mtf_compress, mtf_decompress
+from util import block_index, mapped_input
 
-BLOCK_SIZE = 1024 * 64
 
+BLOCK_SIZE = 1024 * 900
+# версия контейнера: байт версии, затем блоки (заголовок длин кодов, первичный индекс BWT, длина, данные);
+# с версии 2 в конце файла индекс блоков (block_index)
+FORMAT_VERSION = 2
 
-class HuffmanNode:
-    def __init__(self, char=None, frequency=None, left=None, right=None, parent=None):
-        self.char = char
-        self.frequency = frequency
-        self.left = left
-        self.right = right
-        self.parent = parent
 
-    def __lt__(self, other):
-        return self.frequency < other.frequency
+def compress_block(block: bytes) -> bytes:
+    """BWT + MTF + Huffman для одного блока; результат — запись контейнера"""
+    bwt_data, primary_index = bwt_transform_indexed(block)
+    header, huffman_data = ha.huffman_pack(mtf_compress(bwt_data))
+    return header + BLOCK_HEADER.pack(primary_index) + struct.pack(">I", len(huffman_data)) + huffman_data
 
 
-def count_symb(input_data):
-    freq_table = defaultdict(int)
-    for byte in input_data:
-        freq_table[byte] += 1
-    return freq_table
+def compress_file(input_path, output_path, workers=None, use_mmap=False, threaded=False):
+    """
+    Блоки сжимаются параллельно в workers процессах и пишутся по порядку
+    :param workers: число процессов (None — по числу ядер, 1 — в текущем процессе)
+    :param use_mmap: читать вход через mmap: блоки — срезы отображения, а не копии
+    :param threaded: читать и писать в отдельных потоках, а блоки сжимать в workers потоках (parallel.map_threaded)
+    """
+    start_time = time.time()
 
+    with mapped_input.open_blocks(input_path, BLOCK_SIZE, use_mmap) as blocks, open(output_path, "wb") as fout:
+        fout.write(bytes([FORMAT_VERSION]))
+        block_index.write_blocks(blocks, fout, compress_block, workers, threaded)
 
-def suffix_array(text):
-    text += b'\x00'
-    n = len(text)
-    s_a = list(range(n))
+    ratio = os.path.getsize(input_path) / os.path.getsize(output_path)
+    print(f"BWT + MTF + HA: коэффициент {ratio:.2f}, {time.time() - start_time:.2f} сек")
 
-    for i in range(n):
-        s_a[i] = (text[i:], i)
-    s_a.sort()
-    return [suffix[1] for suffix in s_a]
 
+def decompress_block(record: bytes) -> bytes:
+    lengths, offset = ha.unpack_code_lengths(record)
+    primary_index = BLOCK_HEADER.unpack_from(record, offset)[0]
+    offset += BLOCK_HEADER.size
+    data_len = struct.unpack_from(">I", record, offset)[0]
+    offset += 4
 
-def bwt_from_suffix_array(s):
-    sa = suffix_array(s)
-    s += b'\x00'
-    n = len(s)
-    bwt = bytes(s[(i - 1) % n] for i in sa)
-    return bwt
+    bwt_data = mtf_decompress(huffman_decompress(record[offset:offset + data_len], ha.canonical_code_map(lengths)))
+    return bwt_inverse_indexed(bwt_data, primary_index)
 
 
-def ibwt(bwt):
-    n = len(bwt)
-    freq = [0] * 256
-    for byte in bwt:
-        freq[byte] += 1
+def decompress_file(input_path, output_path, workers=None):
+    """
+    Блоки находятся по индексу в конце файла и распаковываются параллельно; версия 1 без индекса читается по порядку
+    :param workers: число процессов (None — по числу ядер, 1 — в текущем процессе)
+    """
+    with open(input_path, "rb") as fin:
+        version = fin.read(1)[0]
+    if version == FORMAT_VERSION:
+        block_index.decompress_blocks(input_path, output_path, decompress_block, workers)
+        return
+    if version != 1:
+        raise ValueError(f"Неподдерживаемая версия формата: {version}")
 
-    start = [0] * 256
-    for i in range(1, 256):
-        start[i] = start[i - 1] + freq[i - 1]
+    with open(input_path, "rb") as fin, open(output_path, "wb") as fout:
+        fin.seek(1)
+        while True:
+            lengths = ha.read_code_lengths(fin)
+            if lengths is None:
+                break
+            primary_index = BLOCK_HEADER.unpack(fin.read(BLOCK_HEADER.size))[0]
+            data_len = struct.unpack(">I", fin.read(4))[0]
 
-    lf = [0] * n
-    count = [0] * 256
-    for i in range(n):
-        byte = bwt[i]
-        lf[i] = start[byte] + count[byte]
-        count[byte] += 1
+            bwt_data = mtf_decompress(huffman_decompress(fin.read(data_len), ha.canonical_code_map(lengths)))
+            fout.write(bwt_inverse_indexed(bwt_data, primary_index))
 
-    original_data = bytearray()
-    i = bwt.index(0)  # Ищем нулевой байт
-    for _ in range(n - 1):
-        i = lf[i]
-        original_data.append(bwt[i])
 
-    return bytes(original_data[::-1])
+def read_range(path, offset, length):
+    """length байт исходных данных с offset: распаковываются только блоки из этого диапазона"""
+    return block_index.read_range(path, offset, length, decompress_block)
 
 
-def mtf_compress(data: bytes) -> bytes:
-    alphabet = list(range(256))
-    result = bytearray()
+if __name__ == "__main__":
+    input_file = "test_files/Master.txt"
+    compressed_file = "tests/compressed_files/enwik7/BWT_MTF_HA_compressed.bin"
+    decompressed_file = "tests/decompressed_files/enwik7/BWT_MTF_HA_decompressed.txt"
 
-    for byte in data:
-        index = alphabet.index(byte)
-        result.append(index)
-        alphabet.pop(index)
-        alphabet.insert(0, byte)
+    compress_file(input_file, compressed_file)
+    decompress_file(compressed_file, decompressed_file)
 
-    return bytes(result)
-
-
-def mtf_decompress(compressed_data: bytes) -> bytes:
-    alphabet = list(range(256))
-    result = bytearray()
-
-    for index in compressed_data:
-        byte = alphabet[index]
-        result.append(byte)
-        alphabet.pop(index)
-        alphabet.insert(0, byte)
-
-    return bytes(result)
-
-
-def huffman_compress(input_data):
-    freq_table = count_symb(input_data)
-    leaf_nodes = []
-    min_heap = queue.PriorityQueue()
-
-    for char in range(256):
-        if freq_table.get(char, 0) > 0:
-            node = HuffmanNode(char=char, frequency=freq_table[char])
-            leaf_nodes.append(node)
-            min_heap.put(node)
-
-    while min_heap.qsize() > 1:
-        left = min_heap.get()
-        right = min_heap.get()
-        merged = HuffmanNode(
-            left=left,
-            right=right,
-            frequency=left.frequency + right.frequency
-        )
-        left.parent = merged
-        right.parent = merged
-        min_heap.put(merged)
-
-    encoding_map = {}
-    for node in leaf_nodes:
-        current = node
-        code_bits = []
-        while current.parent:
-            code_bits.insert(0, '0' if current.parent.left == current else '1')
-            current = current.parent
-        encoding_map[node.char] = ''.join(code_bits)
-
-    bit_stream = ''.join(encoding_map[byte] for byte in input_data)
-
-    pad_length = (8 - len(bit_stream) % 8)
-    padded_stream = f"{pad_length:08b}{bit_stream}{'0' * pad_length}"
-
-    compressed = bytearray()
-    for i in range(0, len(padded_stream), 8):
-        compressed.append(int(padded_stream[i:i + 8], 2))
-
-    return bytes(compressed), encoding_map
-
-
-def huffman_decompress(compressed_data, encoding_map):
-    if not compressed_data:
-        return b''
-
-    pad_info = compressed_data[0]
-    bit_stream = ''.join(f"{byte:08b}" for byte in compressed_data[1:])
-
-    if pad_info > 0:
-        bit_stream = bit_stream[:-pad_info]
-
-    decoding_map = {code: char for char, code in encoding_map.items()}
-    buffer = ""
-    output = bytearray()
-
-    for bit in bit_stream:
-        buffer += bit
-        if buffer in decoding_map:
-            output.append(decoding_map[buffer])
-            buffer = ""
-
-    return bytes(output)
\ No newline at end of file
+    with open(input_file, "rb") as f1, open(decompressed_file, "rb") as f2:
+        print("Проверка:", f1.read() == f2.read())
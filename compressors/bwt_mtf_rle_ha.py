@@ -1,84 +1,28 @@
 import time
 import os
 import struct
-import queue
-from collections import defaultdict
-import pickle
 
-BLOCK_SIZE = 1024 * 64  # 64KB блоки
+from compressing_algorithms import ha, mtf, zrle
+from compressing_algorithms.bwt import BLOCK_HEADER, bwt_inverse, bwt_inverse_indexed, bwt_transform_indexed
+from util import block_index, mapped_input
 
-
-class HuffmanNode:
-    def __init__(self, char=None, frequency=None, left=None, right=None):
-        self.char = char
-        self.frequency = frequency
-        self.left = left
-        self.right = right
-        self.code = ''
-
-    def __lt__(self, other):
-        return self.frequency < other.frequency
-
-
-# Улучшенная реализация BWT
-def bwt_transform(s):
-    n = len(s)
-    s += b'\x00'  # Добавляем нулевой байт как маркер конца
-    rotations = sorted([s[i:] + s[:i] for i in range(n + 1)])
-    last_column = bytes([rotation[-1] for rotation in rotations])
-    return last_column
-
-
-def inverse_bwt(bwt):
-    table = [bytearray() for _ in range(len(bwt))]
-    for _ in range(len(bwt)):
-        table.sort(key=lambda x: bytes(x))
-        for i in range(len(bwt)):
-            table[i].insert(0, bwt[i])
-    for row in table:
-        if row[-1] == 0:
-            return bytes(row[:-1])
-    return b''
+BLOCK_SIZE = 1024 * 900  # 900KB блоки, как в bzip2
+# версия контейнера: байт версии, затем блоки (заголовок длин кодов, первичный индекс BWT, длина, данные);
+# с версии 3 после MTF идут серии нулей RUNA/RUNB (zrle) вместо пар (счётчик, байт);
+# с версии 4 в конце файла индекс блоков (block_index), по нему блоки распаковываются параллельно
+FORMAT_VERSION = 4
 
 
 # MTF преобразование
 def mtf_encode(data):
-    alphabet = list(range(256))
-    result = bytearray()
-    for byte in data:
-        idx = alphabet.index(byte)
-        result.append(idx)
-        alphabet.pop(idx)
-        alphabet.insert(0, byte)
-    return bytes(result)
+    return mtf.mtf_compress(data)
 
 
 def mtf_decode(data):
-    alphabet = list(range(256))
-    result = bytearray()
-    for idx in data:
-        byte = alphabet[idx]
-        result.append(byte)
-        alphabet.pop(idx)
-        alphabet.insert(0, byte)
-    return bytes(result)
-
-
-# RLE кодирование
-def rle_encode(data):
-    result = bytearray()
-    i = 0
-    while i < len(data):
-        current = data[i]
-        count = 1
-        while i + count < len(data) and count < 255 and data[i + count] == current:
-            count += 1
-        result.append(count)
-        result.append(current)
-        i += count
-    return bytes(result)
+    return mtf.mtf_decompress(data)
 
 
+# RLE пар (счётчик, байт): только для чтения контейнеров версий 1 и 2
 def rle_decode(data):
     result = bytearray()
     for i in range(0, len(data), 2):
@@ -90,127 +34,96 @@ def rle_decode(data):
     return bytes(result)
 
 
-# Кодирование Хаффмана
-def build_frequency_table(data):
-    freq = defaultdict(int)
-    for byte in data:
-        freq[byte] += 1
-    return freq
-
-
-def build_huffman_tree(freq):
-    heap = queue.PriorityQueue()
-    for char, count in freq.items():
-        heap.put(HuffmanNode(char=char, frequency=count))
-
-    while heap.qsize() > 1:
-        left = heap.get()
-        right = heap.get()
-        merged = HuffmanNode(frequency=left.frequency + right.frequency,
-                             left=left, right=right)
-        heap.put(merged)
+# Серии нулей после MTF (RUNA/RUNB, как в bzip2)
+def zero_run_encode(data):
+    return zrle.zrle_compress(data)
 
-    return heap.get()
 
-
-def build_code_map(root, path="", code_map=None):
-    if code_map is None:
-        code_map = {}
-    if root.char is not None:
-        code_map[root.char] = path
-        return code_map
-    build_code_map(root.left, path + "0", code_map)
-    build_code_map(root.right, path + "1", code_map)
-    return code_map
+def zero_run_decode(symbols):
+    return zrle.zrle_decompress(symbols)
 
 
+# Кодирование Хаффмана
 def huffman_encode(data, code_map):
-    bit_string = ''.join(code_map[byte] for byte in data)
-    padding = (8 - len(bit_string) % 8)
-    bit_string += '0' * padding
-    encoded = bytearray()
-    encoded.append(padding)
-    for i in range(0, len(bit_string), 8):
-        byte = bit_string[i:i + 8]
-    encoded.append(int(byte, 2))
-    return bytes(encoded)
+    return ha.huffman_encode(data, code_map)
 
 
 def huffman_decode(encoded_data, code_map):
-    if not encoded_data:
-        return b''
-
-    padding = encoded_data[0]
-    bit_string = ''.join(f"{byte:08b}" for byte in encoded_data[1:])
-    if padding > 0:
-        bit_string = bit_string[:-padding]
-
-    reverse_map = {v: k for k, v in code_map.items()}
-    current_code = ""
-    result = bytearray()
-
-    for bit in bit_string:
-        current_code += bit
-        if current_code in reverse_map:
-            result.append(reverse_map[current_code])
-            current_code = ""
-    return bytes(result)
+    return ha.huffman_decompress(encoded_data, code_map)
 
 
 # Основные функции
-def compress_file(input_path, output_path):
+def compress_block(block):
+    """Сжатие одного блока в запись контейнера; функция уровня модуля, чтобы её можно было отдать в процесс"""
+    # Цепочка преобразований
+    bwt_data, primary_index = bwt_transform_indexed(block)
+    mtf_data = mtf_encode(bwt_data)
+    run_data = zero_run_encode(mtf_data)
+
+    # Кодирование Хаффмана
+    header, huffman_data = ha.huffman_pack(run_data, zrle.ALPHABET_SIZE)
+
+    # Длины кодов, первичный индекс и данные
+    return header + BLOCK_HEADER.pack(primary_index) + struct.pack(">I", len(huffman_data)) + huffman_data
+
+
+def compress_file(input_path, output_path, workers=None, use_mmap=False, threaded=False):
+    """
+    Сжатие файла; блоки независимы и сжимаются параллельно в workers процессах, а пишутся по порядку
+    :param workers: число процессов (None — по числу ядер, 1 — в текущем процессе)
+    :param use_mmap: читать вход через mmap: блоки — срезы отображения, а не копии
+    :param threaded: читать и писать в отдельных потоках, а блоки сжимать в workers потоках (parallel.map_threaded)
+    """
     start_time = time.time()
     original_size = os.path.getsize(input_path)
 
-    with open(input_path, "rb") as fin, open(output_path, "wb") as fout:
-        while True:
-            block = fin.read(BLOCK_SIZE)
-            if not block:
-                break
-
-            # Цепочка преобразований
-            bwt_data = bwt_transform(block)
-            mtf_data = mtf_encode(bwt_data)
-            rle_data = rle_encode(mtf_data)
-
-            # Кодирование Хаффмана
-            freq = build_frequency_table(rle_data)
-            if not freq:
-                continue
-
-            tree = build_huffman_tree(freq)
-            code_map = build_code_map(tree)
-            huffman_data = huffman_encode(rle_data, code_map)
-
-            # Сохраняем дерево и данные
-            tree_bytes = pickle.dumps(code_map)
-            fout.write(struct.pack(">I", len(tree_bytes)))
-            fout.write(tree_bytes)
-            fout.write(struct.pack(">I", len(huffman_data)))
-            fout.write(huffman_data)
+    with mapped_input.open_blocks(input_path, BLOCK_SIZE, use_mmap) as blocks, open(output_path, "wb") as fout:
+        fout.write(bytes([FORMAT_VERSION]))
+        block_index.write_blocks(blocks, fout, compress_block, workers, threaded)
 
     compressed_size = os.path.getsize(output_path)
     ratio = original_size / compressed_size if compressed_size > 0 else 0
     print(f"Compression complete. Ratio: {ratio:.2f}, Time: {time.time() - start_time:.2f}s")
 
 
-def decompress_file(input_path, output_path):
+def decompress_block(record):
+    """Распаковка одной записи контейнера версии 3 и выше"""
+    lengths, offset = ha.unpack_code_lengths(record)
+    primary_index = BLOCK_HEADER.unpack_from(record, offset)[0]
+    offset += BLOCK_HEADER.size
+    data_len = struct.unpack_from(">I", record, offset)[0]
+    offset += 4
+
+    rle_data = huffman_decode(record[offset:offset + data_len], ha.canonical_code_map(lengths))
+    return bwt_inverse_indexed(mtf_decode(zero_run_decode(rle_data)), primary_index)
+
+
+def decompress_file(input_path, output_path, workers=None):
+    """
+    Распаковка; начиная с версии 4 блоки находятся по индексу и распаковываются параллельно
+    :param workers: число процессов (None — по числу ядер, 1 — в текущем процессе)
+    """
     start_time = time.time()
 
+    with open(input_path, "rb") as fin:
+        version = fin.read(1)[0]
+    if version == FORMAT_VERSION:
+        block_index.decompress_blocks(input_path, output_path, decompress_block, workers)
+        print(f"Decompression complete. Time: {time.time() - start_time:.2f}s")
+        return
+
     with open(input_path, "rb") as fin, open(output_path, "wb") as fout:
+        fin.seek(1)
+        if version not in (1, 2, 3):
+            raise ValueError(f"Неподдерживаемая версия формата: {version}")
         while True:
-            # Читаем дерево Хаффмана
-            len_bytes = fin.read(4)
-            if not len_bytes:
-                break
-            tree_len = struct.unpack(">I", len_bytes)[0]
-            tree_bytes = fin.read(tree_len)
-            if not tree_bytes:
-                break
-            try:
-                code_map = pickle.loads(tree_bytes)
-            except:
+            # Читаем длины кодов Хаффмана
+            lengths = ha.read_code_lengths(fin)
+            if lengths is None:
                 break
+            code_map = ha.canonical_code_map(lengths)
+            # в версии 1 первичного индекса нет: блок заканчивался нулевым маркером
+            primary_index = BLOCK_HEADER.unpack(fin.read(BLOCK_HEADER.size))[0] if version > 1 else None
 
             # Читаем сжатые данные
             len_bytes = fin.read(4)
@@ -226,9 +139,12 @@ def decompress_file(input_path, output_path):
             if not rle_data:
                 continue
 
-            mtf_data = rle_decode(rle_data)
+            mtf_data = zero_run_decode(rle_data) if version >= 3 else rle_decode(rle_data)
             bwt_data = mtf_decode(mtf_data)
-            original_block = inverse_bwt(bwt_data)
+            if primary_index is None:
+                original_block = bwt_inverse(bwt_data)
+            else:
+                original_block = bwt_inverse_indexed(bwt_data, primary_index)
 
             if original_block:
                 fout.write(original_block)
@@ -236,20 +152,9 @@ def decompress_file(input_path, output_path):
     print(f"Decompression complete. Time: {time.time() - start_time:.2f}s")
 
 
-input_file = "..compressors/enwik5.txt"
-compressed_file = "tests/compressed_files/enwik7/BWT_MTF_RLE_HA_compressed.bin"
-decompressed_file = "tests/decompressed_files/enwik7/BWT_MTF_RLE_HA_decompressed.txt"
-
-# Создаем тестовый файл, если его нет
-if not os.path.exists(input_file):
-    with open(input_file, "w") as f:
-        f.write("This is a test file for BWT+MTF+RLE+Huffman compression algorithm.")
-
-# Сжатие
-compress_file(input_file, compressed_file)
-
-# Распаковка
-decompress_file(compressed_file, decompressed_file)
+def read_range(path, offset, length):
+    """length байт исходных данных с offset: распаковываются только блоки из этого диапазона"""
+    return block_index.read_range(path, offset, length, decompress_block)
 
 
 # Проверка
@@ -258,4 +163,21 @@ def files_are_equal(file1, file2):
         return f1.read() == f2.read()
 
 
-print("Verification:", files_are_equal(input_file, decompressed_file))
\ No newline at end of file
+if __name__ == "__main__":
+    input_file = "..compressors/enwik5.txt"
+    compressed_file = "tests/compressed_files/enwik7/BWT_MTF_RLE_HA_compressed.bin"
+    decompressed_file = "tests/decompressed_files/enwik7/BWT_MTF_RLE_HA_decompressed.txt"
+
+    # Создаем тестовый файл, если его нет
+    if not os.path.exists(input_file):
+        with open(input_file, "w") as f:
+            f.write("This is a test file for BWT+MTF+RLE+Huffman compression algorithm.")
+
+    # Сжатие
+    compress_file(input_file, compressed_file)
+
+    # Распаковка
+    decompress_file(compressed_file, decompressed_file)
+
+    # Проверка
+    print("Verification:", files_are_equal(input_file, decompressed_file))
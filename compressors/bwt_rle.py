@@ -2,74 +2,22 @@ import time
 import os
 import struct
 
-BLOCK_SIZE = 1024 * 64
-
-def suffix_array(text):
-    text += b'\x00'
-    n = len(text)
-    s_a = list(range(n))
-
-    for i in range(n):
-        s_a[i] = (text[i:], i)
-    s_a.sort()
-    return [suffix[1] for suffix in s_a]
-
-def bwt_from_suffix_array(s):
-    sa = suffix_array(s)
-    s += b'\x00'
-    n = len(s)
-    bwt = bytes(s[(i - 1) % n] for i in sa)
-    return bwt
-
-def ibwt(bwt):
-    n = len(bwt)
-    freq = [0] * 256
-    for byte in bwt:
-        freq[byte] += 1
-
-    start = [0] * 256
-    for i in range(1, 256):
-        start[i] = start[i - 1] + freq[i - 1]
-
-    lf = [0] * n
-    count = [0] * 256
-    for i in range(n):
-        byte = bwt[i]
-        lf[i] = start[byte] + count[byte]
-        count[byte] += 1
-
-    original_data = bytearray()
-    i = bwt.index(b'\x00')
-    for _ in range(n - 1):
-        i = lf[i]
-        original_data.append(bwt[i])
-
-    return bytes(original_data[::-1])
+from compressing_algorithms import rle
+from compressing_algorithms.bwt import BLOCK_HEADER, bwt_inverse_indexed, bwt_transform_indexed
+from util import block_index, mapped_input
+
+BLOCK_SIZE = 1024 * 900  # блоки как в bzip2: суффиксный массив строится за O(n log n)
+# версия контейнера: байт версии, записи блоков (первичный индекс BWT, длина, rle.rle_pack), индекс блоков.
+# Раньше байта версии не было; из тех файлов читаются только последние, с индексом блоков: они начинаются
+# с нулевого байта (старший байт первичного индекса). Более старые форматы отвергаются.
+FORMAT_VERSION = 4
 
 def rle_compress(data: bytes) -> bytes:
-    compressed_data = bytearray()
-    n = len(data)
-    i = 0
-    while i < n:
-        current_byte = data[i]
-        count = 1
-        while i + count < n and count < 255 and data[i + count] == current_byte:
-            count += 1
-        compressed_data.append(count)
-        compressed_data.append(current_byte)
-        i += count
-    return bytes(compressed_data)
+    """RLE с varint-счётчиками; байт версии впереди блока, серии не режутся по 255"""
+    return rle.rle_pack(data, rle.RLE_VARINT)
 
 def rle_decompress(compressed_data: bytes) -> bytes:
-    decompressed_data = bytearray()
-    n = len(compressed_data)
-    i = 0
-    while i < n:
-        count = compressed_data[i]
-        byte = compressed_data[i + 1]
-        decompressed_data.extend([byte] * count)
-        i += 2
-    return bytes(decompressed_data)
+    return rle.rle_unpack(compressed_data)
 
 def compare_files_in_chunks(file1_path, file2_path, chunk_size=4096):
     try:
@@ -88,45 +36,73 @@ def compare_files_in_chunks(file1_path, file2_path, chunk_size=4096):
         return False
 
 
-filepath = "test_files/Master.txt"
-outfile = "tests/decompressed_files/enwik7/BWT_RLE_decompressed.txt"
-compressed_file = "tests/compressed_files/enwik7/BWT_RLE_compressed.txt"
-
-original_size = os.path.getsize(filepath)
-
-# Сжатие
-start_time = time.time()
-
-with open(filepath, "rb") as file, open(compressed_file, "wb") as comp:
-    while True:
-        text = file.read(BLOCK_SIZE)
-        if not text:
-            break
-        print("Блок обрабатывается")
-        bwt_data = bwt_from_suffix_array(text)
-        compressed_block = rle_compress(bwt_data)
-        comp.write(struct.pack(">I", len(compressed_block)))
-        comp.write(compressed_block)
-
-
-with open(compressed_file, "rb") as comp, open(outfile, "wb") as out:
-    while True:
-        len_bytes = comp.read(4)
-        if not len_bytes:
-            break
-        block_len = struct.unpack(">I", len_bytes)[0]
-        compressed_block = comp.read(block_len)
-        if not compressed_block:
-            break
-        bwt_data = rle_decompress(compressed_block)
-        original_block = ibwt(bwt_data)
-        out.write(original_block)
-
-final_time = time.time() - start_time
-print(f"bwt + rle time: {final_time:.2f} seconds")
-
-compressed_size = os.path.getsize(compressed_file)
-compression_ratio = original_size / compressed_size
-print(f"Коэффициент сжатия: {compression_ratio:.2f}")
-
-print(compare_files_in_chunks(filepath, outfile, BLOCK_SIZE))
\ No newline at end of file
+def compress_block(block: bytes) -> bytes:
+    """Запись одного блока: первичный индекс BWT, длина, данные RLE"""
+    bwt_data, primary_index = bwt_transform_indexed(block)
+    compressed_block = rle_compress(bwt_data)
+    return BLOCK_HEADER.pack(primary_index) + struct.pack(">I", len(compressed_block)) + compressed_block
+
+def decompress_block(record: bytes) -> bytes:
+    primary_index = BLOCK_HEADER.unpack_from(record)[0]
+    block_len = struct.unpack_from(">I", record, BLOCK_HEADER.size)[0]
+    start = BLOCK_HEADER.size + 4
+    bwt_data = rle_decompress(record[start:start + block_len])
+    return bwt_inverse_indexed(bwt_data, primary_index)
+
+def _check_version(path):
+    with open(path, "rb") as fin:
+        version = fin.read(1)
+        if version == bytes([FORMAT_VERSION]):
+            return
+        if version == b"\0":
+            try:
+                block_index.read_index(fin)
+                return
+            except ValueError:
+                pass
+    raise ValueError(f"Неподдерживаемая версия формата: {version[0] if version else 'пустой файл'} "
+                     f"(ожидается {FORMAT_VERSION}; старые файлы без байта версии не читаются)")
+
+def compress_file(input_path, output_path, workers=None, use_mmap=False, threaded=False):
+    """
+    Блоки сжимаются параллельно в workers процессах и пишутся по порядку, в конце — индекс блоков
+    :param workers: число процессов (None — по числу ядер, 1 — в текущем процессе)
+    :param use_mmap: читать вход через mmap: блоки — срезы отображения, а не копии
+    :param threaded: читать и писать в отдельных потоках, а блоки сжимать в workers потоках (parallel.map_threaded)
+    """
+    with mapped_input.open_blocks(input_path, BLOCK_SIZE, use_mmap) as blocks, open(output_path, "wb") as comp:
+        comp.write(bytes([FORMAT_VERSION]))
+        block_index.write_blocks(blocks, comp, compress_block, workers, threaded)
+
+def decompress_file(input_path, output_path, workers=None):
+    """Блоки находятся по индексу в конце файла и распаковываются параллельно"""
+    _check_version(input_path)
+    block_index.decompress_blocks(input_path, output_path, decompress_block, workers)
+
+def read_range(path, offset, length):
+    """length байт исходных данных с offset: распаковываются только блоки из этого диапазона"""
+    _check_version(path)
+    return block_index.read_range(path, offset, length, decompress_block)
+
+
+if __name__ == "__main__":
+    filepath = "test_files/Master.txt"
+    outfile = "tests/decompressed_files/enwik7/BWT_RLE_decompressed.txt"
+    compressed_file = "tests/compressed_files/enwik7/BWT_RLE_compressed.txt"
+
+    original_size = os.path.getsize(filepath)
+
+    # Сжатие
+    start_time = time.time()
+
+    compress_file(filepath, compressed_file)
+    decompress_file(compressed_file, outfile)
+
+    final_time = time.time() - start_time
+    print(f"bwt + rle time: {final_time:.2f} seconds")
+
+    compressed_size = os.path.getsize(compressed_file)
+    compression_ratio = original_size / compressed_size
+    print(f"Коэффициент сжатия: {compression_ratio:.2f}")
+
+    print(compare_files_in_chunks(filepath, outfile, BLOCK_SIZE))
@@ -0,0 +1,257 @@
+import asyncio
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from compressors import pipeline
+from compressors.async_pipeline import AsyncCompressor
+
+# Демон сжатия на Unix-сокете: процессы пула запускаются один раз, конвейеры кэшируются в них
+# (pipeline.get_pipeline), поэтому запрос стоит только работы кодеков, без запуска Python и импорта NumPy.
+#
+# Запрос: REQUEST_HEADER (операция, длина спецификации, длина данных), спецификация ASCII, данные.
+# Ответ: RESPONSE_HEADER (статус, длина), затем результат или текст ошибки в UTF-8.
+# По одному соединению можно отправить сколько угодно запросов подряд.
+
+# у каждого пользователя свой сокет; права 0600, так что запросы принимаются только от владельца
+SOCKET_PATH = os.path.join(tempfile.gettempdir(), f"compressing-daemon-{os.getuid()}.sock")
+REQUEST_HEADER = struct.Struct(">BBQ")
+RESPONSE_HEADER = struct.Struct(">BQ")
+OP_COMPRESS = 1
+OP_DECOMPRESS = 2
+STATUS_OK = 0
+STATUS_ERROR = 1
+# больше в один запрос не принимается и не распаковывается: такие файлы лучше сжимать pipeline.compress_file
+MAX_PAYLOAD = 1 << 24
+# сколько запросов читается и обрабатывается одновременно; остальные ждут, не читая данные,
+# поэтому в памяти демона не больше MAX_REQUESTS * MAX_PAYLOAD входных байт при любом числе соединений
+MAX_REQUESTS = 8
+# секунд на чтение спецификации и данных запроса: клиент, который прислал заголовок и замолчал,
+# не держит слот MAX_REQUESTS дольше. Ожидание следующего заголовка не ограничено
+READ_TIMEOUT = 30
+
+
+def _remove_stale_socket(path):
+    """Удаляет сокет, оставшийся от завершившегося демона; чужие файлы и работающий демон не трогает"""
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise ValueError(f"{path} уже существует и не является нашим сокетом")
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise ValueError(f"Демон уже слушает {path}")
+
+
+def _init_worker():
+    """
+    Процесс пула получает при fork обработчик SIGTERM и сокет пробуждения цикла демона: SIGTERM, которым пул
+    останавливает процессы (shutdown, поломка пула), остановил бы сам демон
+    """
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def _warm_up(spec):
+    """Выполняется в каждом процессе пула: импорт кодеков и конвейер spec в кэше"""
+    pipeline.get_pipeline(spec).encode_block(b"warm up")
+
+
+async def _start_pool(workers, specs):
+    """Пул с прогревом: по задаче на процесс, чтобы все процессы запустились и импортировали кодеки до запроса"""
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    loop = asyncio.get_running_loop()
+    try:
+        await asyncio.gather(*(loop.run_in_executor(executor, _warm_up, spec) for spec in specs for _ in range(workers)))
+    except BaseException:
+        executor.shutdown(cancel_futures=True)
+        raise
+    return executor
+
+
+async def _process(compressor, op, spec, payload):
+    if op == OP_COMPRESS:
+        return await compressor.compress_bytes(payload, spec)
+    if op == OP_DECOMPRESS:
+        # ответ не больше запроса на сжатие: иначе маленький запрос занял бы память демона
+        return await compressor.decompress_bytes(payload, MAX_PAYLOAD)
+    raise ValueError(f"Неизвестная операция: {op}")
+
+
+async def _read_body(reader, spec_length, size):
+    spec = (await reader.readexactly(spec_length)).decode("ascii", "replace")
+    return spec, await reader.readexactly(size)
+
+
+async def _handle(reader, writer, compressor, requests, restart):
+    try:
+        while True:
+            try:
+                header = await reader.readexactly(REQUEST_HEADER.size)
+            except asyncio.IncompleteReadError:
+                return  # клиент закрыл соединение
+            op, spec_length, size = REQUEST_HEADER.unpack(header)
+            if size > MAX_PAYLOAD:
+                # данные не читаются: после ответа соединение закрывается
+                message = f"Запрос больше {MAX_PAYLOAD} байт: {size}".encode("utf-8")
+                writer.write(RESPONSE_HEADER.pack(STATUS_ERROR, len(message)) + message)
+                await writer.drain()
+                return
+
+            async with requests:
+                try:
+                    spec, payload = await asyncio.wait_for(_read_body(reader, spec_length, size), READ_TIMEOUT)
+                except asyncio.TimeoutError:
+                    return  # соединение закрывается, слот освобождается
+
+                executor = compressor.executor
+                try:
+                    try:
+                        result = await _process(compressor, op, spec, payload)
+                    except BrokenProcessPool:
+                        # процесс пула убит (OOM killer, сигнал): пул пересоздаётся, запрос повторяется один раз;
+                        # если пул ломается и при повторе, ошибку получает только этот запрос
+                        await restart(executor)
+                        result = await _process(compressor, op, spec, payload)
+                    status = STATUS_OK
+                except Exception as error:
+                    # испорченные данные не должны останавливать демон: ошибка уходит клиенту
+                    result, status = f"{type(error).__name__}: {error}".encode("utf-8"), STATUS_ERROR
+
+                writer.write(RESPONSE_HEADER.pack(status, len(result)))
+                writer.write(result)
+                await writer.drain()
+                # простаивающее соединение не должно держать данные прошлого запроса
+                del payload, result
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(path=SOCKET_PATH, workers=None, specs=(pipeline.DEFAULT_SPEC,)):
+    """
+    Демон: слушает Unix-сокет path, пока его не остановят
+    :param workers: число процессов пула (None — по числу ядер)
+    :param specs: конвейеры, которые заранее создаются в каждом процессе
+    """
+    _remove_stale_socket(path)
+    workers = workers or os.cpu_count() or 1
+    compressor = AsyncCompressor(await _start_pool(workers, specs))
+    restarting = asyncio.Lock()
+
+    async def restart(broken):
+        """Заменяет сломанный пул broken новым; запросы, заставшие одну и ту же поломку, пересоздают его один раз"""
+        async with restarting:
+            if compressor.executor is broken:
+                compressor.executor = await _start_pool(workers, specs)
+                broken.shutdown(wait=False)
+
+    requests = asyncio.Semaphore(MAX_REQUESTS)
+    loop = asyncio.get_running_loop()
+    server = None
+    try:
+        # SIGTERM завершает демон так же, как Ctrl+C: пул останавливается, сокет удаляется
+        try:
+            loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except RuntimeError:
+            pass  # сигналы принимает только главный поток: в другом потоке демон останавливают отменой задачи
+
+        # сокет создаётся сразу с правами 0600: между bind и chmod к нему успел бы подключиться кто угодно
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(
+                lambda reader, writer: _handle(reader, writer, compressor, requests, restart), path)
+        finally:
+            os.umask(umask)
+        print(f"Демон сжатия слушает {path}, процессов: {workers}")
+        async with server:
+            await server.serve_forever()
+    finally:
+        loop.remove_signal_handler(signal.SIGTERM)
+        compressor.executor.shutdown(cancel_futures=True)
+        if server is not None and os.path.exists(path):
+            os.unlink(path)
+
+
+def _recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(min(size - len(data), 1 << 20))
+        if not chunk:
+            raise ConnectionError("Демон закрыл соединение")
+        data += chunk
+    return bytes(data)
+
+
+class DaemonClient:
+    """
+    Тонкий клиент демона: одно соединение на много запросов.
+    Результаты те же, что у pipeline.compress_file / decompress_file.
+    """
+
+    def __init__(self, path=SOCKET_PATH):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+
+    def _request(self, op, payload, spec=""):
+        if len(payload) > MAX_PAYLOAD:
+            raise ValueError(f"Запрос больше {MAX_PAYLOAD} байт: {len(payload)}")
+        encoded_spec = spec.encode("ascii")
+        self.sock.sendall(REQUEST_HEADER.pack(op, len(encoded_spec), len(payload)) + encoded_spec)
+        self.sock.sendall(payload)
+
+        status, size = RESPONSE_HEADER.unpack(_recv_exactly(self.sock, RESPONSE_HEADER.size))
+        result = _recv_exactly(self.sock, size)
+        if status != STATUS_OK:
+            raise ValueError(result.decode("utf-8"))
+        return result
+
+    def compress(self, data, spec=pipeline.DEFAULT_SPEC) -> bytes:
+        return self._request(OP_COMPRESS, data, spec)
+
+    def decompress(self, data) -> bytes:
+        return self._request(OP_DECOMPRESS, data)
+
+    def compress_file(self, input_path, output_path, spec=pipeline.DEFAULT_SPEC):
+        with open(input_path, "rb") as fin:
+            result = self.compress(fin.read(), spec)
+        with open(output_path, "wb") as fout:
+            fout.write(result)
+
+    def decompress_file(self, input_path, output_path):
+        with open(input_path, "rb") as fin:
+            result = self.decompress(fin.read())
+        with open(output_path, "wb") as fout:
+            fout.write(result)
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    # запускать из корня репозитория: python -m compressors.daemon [путь к сокету]
+    try:
+        asyncio.run(serve(sys.argv[1] if len(sys.argv) > 1 else SOCKET_PATH))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
@@ -0,0 +1,253 @@
+import functools
+import os
+import time
+
+from compressing_algorithms import ha, lz77, lz78, mtf, rle, zrle
+from compressing_algorithms.bwt import BLOCK_HEADER, bwt_inverse_indexed, bwt_transform_indexed
+from util import block_index, mapped_input
+
+FORMAT_VERSION = 1  # байт версии, длина спецификации (1 байт), спецификация ASCII, записи блоков, индекс блоков
+BLOCK_SIZE = 1024 * 900
+DEFAULT_SPEC = "bwt+mtf+zrle+huffman"
+MAX_STAGES = 8  # спецификации приходят и от клиентов демона: длиннее конвейеры не принимаются
+STAGE_OVERHEAD = 4096  # запас на заголовки стадий (первичный индекс BWT, длины кодов Хаффмана)
+
+CODECS = {}
+
+
+def register_codec(name):
+    """Декоратор: класс кодека становится доступен в спецификациях под именем name"""
+    def register(cls):
+        cls.name = name
+        CODECS[name] = cls
+        return cls
+    return register
+
+
+class Codec:
+    """
+    Стадия конвейера: encode и decode над одним блоком.
+    Выход — bytes, либо последовательность символов шире байта, если symbols_out (её принимает только стадия
+    с symbols_in, то есть huffman).
+    decode получает max_size — предел размера выхода; кодеки, которые могут раздуть испорченную запись,
+    проверяют его до того, как выход развёрнут в памяти.
+    """
+    name = None
+    symbols_in = False
+    symbols_out = False
+    # во сколько раз encode может увеличить блок в худшем случае (без заголовка, см. STAGE_OVERHEAD):
+    # по этой оценке decode_block ограничивает выход каждой стадии
+    max_growth = 1
+
+    def encode(self, block):
+        raise NotImplementedError
+
+    def decode(self, block, max_size=None):
+        raise NotImplementedError
+
+
+@register_codec("bwt")
+class BWTCodec(Codec):
+    """Первичный индекс (BLOCK_HEADER), затем последний столбец"""
+
+    def encode(self, block):
+        transformed, primary_index = bwt_transform_indexed(block)
+        return BLOCK_HEADER.pack(primary_index) + transformed
+
+    def decode(self, block, max_size=None):
+        primary_index = BLOCK_HEADER.unpack_from(block)[0]
+        return bwt_inverse_indexed(bytes(block[BLOCK_HEADER.size:]), primary_index)
+
+
+@register_codec("mtf")
+class MTFCodec(Codec):
+    def encode(self, block):
+        return mtf.mtf_compress(block)
+
+    def decode(self, block, max_size=None):
+        return mtf.mtf_decompress(block)
+
+
+@register_codec("rle")
+class RLECodec(Codec):
+    """RLE с varint-счётчиками (rle.RLE_VARINT)"""
+
+    def encode(self, block):
+        return rle.rle_compress_varint(block)
+
+    def decode(self, block, max_size=None):
+        return rle.rle_decompress_varint(block, max_size)
+
+
+@register_codec("zrle")
+class ZeroRunCodec(Codec):
+    """Серии нулей RUNA/RUNB; выход — символы алфавита zrle.ALPHABET_SIZE"""
+    symbols_out = True
+
+    def encode(self, block):
+        return zrle.zrle_compress(block)
+
+    def decode(self, block, max_size=None):
+        return zrle.zrle_decompress(block, max_size)
+
+
+@register_codec("lz77")
+class LZ77Codec(Codec):
+    """Токены TOKENS_VARINT; каждый блок сжимается со своим окном"""
+    max_growth = 2  # совпадение из MIN_MATCH байт занимает до четырёх байт токена
+
+    def encode(self, block):
+        return lz77.lz77_compress(block, show_progress=False)
+
+    def decode(self, block, max_size=None):
+        return lz77.lz77_decompress(block, show_progress=False, max_size=max_size)
+
+
+@register_codec("lz78")
+class LZ78Codec(Codec):
+    max_growth = 5  # пара (индекс, байт) — пять байт на фразу не короче байта
+
+    def encode(self, block):
+        return lz78.lz78_compress(block)
+
+    def decode(self, block, max_size=None):
+        return lz78.lz78_decompress(block, max_size=max_size)
+
+
+@register_codec("lzw")
+class LZWCodec(Codec):
+    max_growth = 3  # код до LZW_MAX_BITS бит на фразу не короче байта, плюс коды LZW_CLEAR
+
+    def encode(self, block):
+        return lz78.lzw_compress(block)
+
+    def decode(self, block, max_size=None):
+        return lz78.lzw_decompress(block, max_size=max_size)
+
+
+@register_codec("huffman")
+class HuffmanCodec(Codec):
+    """Заголовок длин кодов (ha.pack_code_lengths), затем поток; принимает и символы шире байта"""
+    symbols_in = True
+    max_growth = 2  # код символа не длиннее ha.MAX_CODE_LENGTH бит
+
+    def encode(self, block):
+        header, payload = ha.huffman_pack(block)
+        return header + payload
+
+    def decode(self, block, max_size=None):
+        lengths, offset = ha.unpack_code_lengths(block)
+        return ha.huffman_decompress(bytes(block[offset:]), ha.canonical_code_map(lengths))
+
+
+class Pipeline:
+    """
+    Цепочка кодеков по спецификации вида "bwt+mtf+huffman".
+    Блоки проходят стадии слева направо при сжатии и справа налево при распаковке.
+    """
+
+    def __init__(self, spec: str):
+        names = spec.split("+")
+        if len(names) > MAX_STAGES:
+            raise ValueError(f"Слишком много стадий в {spec!r}: {len(names)}, не больше {MAX_STAGES}")
+        for name in names:
+            if name not in CODECS:
+                raise ValueError(f"Неизвестная стадия конвейера {name!r} в {spec!r}")
+
+        self.spec = spec
+        self.stages = [CODECS[name]() for name in names]
+        for stage, next_stage in zip(self.stages, self.stages[1:] + [None]):
+            if stage.symbols_out and (next_stage is None or not next_stage.symbols_in):
+                raise ValueError(f"После стадии {stage.name} должна идти стадия, принимающая символы (huffman)")
+
+    def encode_block(self, block):
+        for stage in self.stages:
+            block = stage.encode(block)
+        return bytes(block)
+
+    def decode_block(self, record, raw_size=None):
+        """
+        :param raw_size: размер блока до сжатия (из индекса блоков), если известен: с ним выход каждой стадии
+            ограничен оценкой по max_growth, так что испорченная запись не раздувается в памяти
+        """
+        limits = [None] * len(self.stages)
+        if raw_size is not None:
+            limit = raw_size
+            for number, stage in enumerate(self.stages):
+                limits[number] = limit
+                limit = limit * stage.max_growth + STAGE_OVERHEAD
+
+        block = record
+        for stage, limit in zip(reversed(self.stages), reversed(limits)):
+            block = stage.decode(block, limit)
+            if limit is not None and len(block) > limit:
+                raise ValueError(f"Стадия {stage.name} распаковала больше {limit} байт")
+        if raw_size is not None and len(block) != raw_size:
+            raise ValueError(f"Размер блока {len(block)} не совпадает с индексом: {raw_size}")
+        return bytes(block)
+
+    def encode_blocks(self, blocks):
+        """Потоковое сжатие: по записи на каждый блок"""
+        for block in blocks:
+            yield self.encode_block(block)
+
+    def decode_blocks(self, records):
+        for record in records:
+            yield self.decode_block(record)
+
+
+@functools.lru_cache(maxsize=64)
+def get_pipeline(spec: str) -> Pipeline:
+    """
+    Один объект на спецификацию: его методы — стабильные ключи кэша блоков в read_range.
+    Кэш ограничен, потому что в долгоживущем демоне спецификации присылают клиенты.
+    """
+    return Pipeline(spec)
+
+
+def read_spec(file) -> str:
+    """Спецификация из заголовка файла; file стоит в начале"""
+    version = file.read(1)[0]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия формата: {version}")
+    length = file.read(1)[0]
+    return file.read(length).decode("ascii")
+
+
+def compress_file(input_path, output_path, spec=DEFAULT_SPEC, workers=None, use_mmap=False, threaded=False):
+    """
+    Сжатие файла конвейером spec; спецификация записывается в заголовок, поэтому распаковке её не передают
+    :param workers: число процессов (None — по числу ядер, 1 — в текущем процессе)
+    :param use_mmap: читать вход через mmap
+    :param threaded: читать и писать в отдельных потоках, а блоки сжимать в workers потоках (parallel.map_threaded)
+    """
+    start_time = time.time()
+    pipeline = get_pipeline(spec)
+    encoded_spec = spec.encode("ascii")
+
+    with mapped_input.open_blocks(input_path, BLOCK_SIZE, use_mmap) as blocks, open(output_path, "wb") as fout:
+        fout.write(bytes([FORMAT_VERSION, len(encoded_spec)]))
+        fout.write(encoded_spec)
+        block_index.write_blocks(blocks, fout, pipeline.encode_block, workers, threaded)
+
+    ratio = os.path.getsize(input_path) / os.path.getsize(output_path)
+    print(f"{spec}: коэффициент {ratio:.2f}, {time.time() - start_time:.2f} сек")
+
+
+def decompress_file(input_path, output_path, workers=None):
+    with open(input_path, "rb") as fin:
+        pipeline = get_pipeline(read_spec(fin))
+    block_index.decompress_blocks(input_path, output_path, pipeline.decode_block, workers)
+
+
+def read_range(path, offset, length):
+    """length байт исходных данных с offset: распаковываются только блоки из этого диапазона"""
+    with open(path, "rb") as fin:
+        pipeline = get_pipeline(read_spec(fin))
+    return block_index.read_range(path, offset, length, pipeline.decode_block)
+
+
+if __name__ == "__main__":
+    # запускать из корня репозитория: python -m compressors.pipeline
+    for spec in ("bwt+rle", "bwt+mtf+huffman", "bwt+mtf+zrle+huffman", "lz77+huffman", "lzw+huffman"):
+        compress_file("test_files/Master.txt", "/tmp/pipeline.bin", spec)
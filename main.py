@@ -1,5 +1,3 @@
-from numpy.ma.core import compressed
-
 from compressors.lz78_ha import *
 
 
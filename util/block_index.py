@@ -0,0 +1,157 @@
+import bisect
+import functools
+import os
+import struct
+from collections import deque
+
+from util import parallel
+
+INDEX_MAGIC = b"BIDX"
+INDEX_ENTRY = struct.Struct(">QII")  # смещение записи блока в файле, её размер, размер блока до сжатия
+INDEX_TRAILER = struct.Struct(">I4s")  # число блоков, INDEX_MAGIC — последние байты файла
+READ_CACHE_BLOCKS = 8  # сколько распакованных блоков держит read_range (по 900KB у BWT-контейнеров)
+
+
+def write_index(file, index):
+    """Индекс блоков в конец контейнера: записи INDEX_ENTRY, затем INDEX_TRAILER"""
+    for entry in index:
+        file.write(INDEX_ENTRY.pack(*entry))
+    file.write(INDEX_TRAILER.pack(len(index), INDEX_MAGIC))
+
+
+def read_index(file):
+    """
+    Чтение индекса из конца контейнера
+    :return: список (смещение записи, размер записи, размер блока до сжатия)
+    """
+    file.seek(0, os.SEEK_END)
+    file_size = file.tell()
+    if file_size < INDEX_TRAILER.size:
+        raise ValueError("Нет индекса блоков")
+
+    file.seek(file_size - INDEX_TRAILER.size)
+    count, magic = INDEX_TRAILER.unpack(file.read(INDEX_TRAILER.size))
+    index_size = count * INDEX_ENTRY.size
+    if magic != INDEX_MAGIC or index_size > file_size - INDEX_TRAILER.size:
+        raise ValueError("Нет индекса блоков")
+
+    file.seek(file_size - INDEX_TRAILER.size - index_size)
+    data = file.read(index_size)
+    return [INDEX_ENTRY.unpack_from(data, i * INDEX_ENTRY.size) for i in range(count)]
+
+
+def write_blocks(blocks, fout, compress_block, workers=None, threaded=False):
+    """
+    Поблочное сжатие (параллельно, см. parallel.imap_ordered) с записью в fout и индексом в конце
+    :param blocks: блоки входа: parallel.read_blocks или mapped_input.map_blocks
+    :param compress_block: функция уровня модуля: блок -> самодостаточная запись блока
+    :param threaded: конвейер parallel.map_threaded: чтение и запись в отдельных потоках,
+        блоки сжимаются в workers потоках
+    :return: индекс блоков
+    """
+    sizes = deque()
+
+    def sized_blocks():
+        for block in blocks:
+            sizes.append(len(block))
+            yield block
+
+    index = []
+
+    def write(record):
+        index.append((fout.tell(), len(record), sizes.popleft()))
+        fout.write(record)
+
+    if threaded:
+        parallel.map_threaded(compress_block, sized_blocks(), write, workers)
+    else:
+        for record in parallel.imap_ordered(compress_block, sized_blocks(), workers):
+            write(record)
+
+    write_index(fout, index)
+    return index
+
+
+def _decode_block_to(task):
+    decompress_block, input_path, output_path, offset, size, output_offset, raw_size = task
+    with open(input_path, "rb") as fin:
+        fin.seek(offset)
+        record = fin.read(size)
+
+    block = decompress_block(record)
+    if len(block) != raw_size:
+        raise ValueError(f"Размер блока {len(block)} не совпадает с индексом: {raw_size}")
+
+    with open(output_path, "r+b") as fout:
+        fout.seek(output_offset)
+        fout.write(block)
+    return raw_size
+
+
+def decompress_blocks(input_path, output_path, decompress_block, workers=None):
+    """
+    Параллельная распаковка по индексу: каждый процесс сам читает свою запись и пишет блок
+    в выходной файл по смещению из индекса, поэтому блоки не проходят через главный процесс.
+    :param decompress_block: функция уровня модуля: запись блока -> исходный блок
+    :param workers: число процессов (None — по числу ядер, 1 — в текущем процессе)
+    """
+    with open(input_path, "rb") as fin:
+        index = read_index(fin)
+
+    with open(output_path, "wb") as fout:
+        fout.truncate(sum(raw_size for _, _, raw_size in index))
+
+    tasks = []
+    output_offset = 0
+    for offset, size, raw_size in index:
+        tasks.append((decompress_block, input_path, output_path, offset, size, output_offset, raw_size))
+        output_offset += raw_size
+
+    for _ in parallel.imap_ordered(_decode_block_to, tasks, workers):
+        pass
+
+
+@functools.lru_cache(maxsize=4)
+def _cached_index(path, stamp):
+    """Индекс и смещение каждого блока в распакованных данных; stamp отличает перезаписанный файл"""
+    with open(path, "rb") as fin:
+        index = read_index(fin)
+
+    starts = [0]
+    for _, _, raw_size in index:
+        starts.append(starts[-1] + raw_size)
+    return index, starts
+
+
+@functools.lru_cache(maxsize=READ_CACHE_BLOCKS)
+def _cached_block(decompress_block, path, stamp, offset, size):
+    with open(path, "rb") as fin:
+        fin.seek(offset)
+        return decompress_block(fin.read(size))
+
+
+def read_range(path, offset, length, decompress_block):
+    """
+    Чтение length байт распакованных данных начиная с offset без распаковки всего файла:
+    по индексу находятся только блоки, пересекающие диапазон, последние распакованные блоки
+    хранятся в LRU-кэше, поэтому соседние чтения обычно не распаковывают ничего заново.
+    За концом данных диапазон обрезается, как при чтении файла.
+    :param decompress_block: функция уровня модуля: запись блока -> исходный блок
+    """
+    if offset < 0 or length < 0:
+        raise ValueError(f"Некорректный диапазон: {offset}, {length}")
+
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    index, starts = _cached_index(path, stamp)
+
+    end = min(offset + length, starts[-1])
+    result = bytearray()
+    block = bisect.bisect_right(starts, offset) - 1
+    while block < len(index) and starts[block] < end:
+        record_offset, record_size, _ = index[block]
+        data = _cached_block(decompress_block, path, stamp, record_offset, record_size)
+        result += data[max(offset - starts[block], 0):end - starts[block]]
+        block += 1
+
+    return bytes(result)
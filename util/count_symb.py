@@ -1,9 +1,16 @@
 import numpy as np
 
 
-def count_symb(data: bytes) -> np.ndarray:
-    counter = np.zeros(256, dtype=int)
-    for byte in data:
-        counter[byte] += 1
+def count_symb(data, alphabet_size: int = 256) -> np.ndarray:
+    """
+    Частоты символов
+    :param data: bytes или последовательность символов (например, array('H')) меньше alphabet_size
+    """
+    if not len(data):
+        return np.zeros(alphabet_size, dtype=int)
 
-    return counter
\ No newline at end of file
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        symbols = np.frombuffer(data, dtype=np.uint8)
+    else:
+        symbols = np.asarray(data)
+    return np.bincount(symbols, minlength=alphabet_size)
@@ -2,6 +2,7 @@ from PIL import Image
 import numpy as np
 import struct
 import os
+import mmap
 
 
 def png_to_raw(image_path, output_path):
@@ -18,25 +19,31 @@ def png_to_raw(image_path, output_path):
 
 
 def raw_to_png(raw_path, output_path, width=None, height=None, channels=3):
+    # пиксели читаются прямо из отображения файла, без промежуточной копии всего файла
     with open(raw_path, 'rb') as f:
-        raw_data = f.read()
+        if os.fstat(f.fileno()).st_size == 0:
+            # пустой файл отобразить нельзя, а изображения без пикселей не бывает
+            raise ValueError(f"Пустой файл изображения: {raw_path}")
+        raw_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
-    raw_array = np.frombuffer(raw_data, dtype=np.uint8)
+    with raw_data:
+        raw_array = np.frombuffer(raw_data, dtype=np.uint8)
+
+        if width is None or height is None:
+            if channels == 3:
+                size = int(np.sqrt(len(raw_array) / 3))
+                width = height = size
+            else:
+                width = height = int(np.sqrt(len(raw_array)))
 
-    if width is None or height is None:
         if channels == 3:
-            size = int(np.sqrt(len(raw_array) / 3))
-            width = height = size
+            image_array = raw_array.reshape((height, width, 3))
         else:
-            width = height = int(np.sqrt(len(raw_array)))
-
-    if channels == 3:
-        image_array = raw_array.reshape((height, width, 3))
-    else:
-        image_array = raw_array.reshape((height, width))
+            image_array = raw_array.reshape((height, width))
 
-    image = Image.fromarray(image_array)
-    image.save(output_path)
+        Image.fromarray(image_array).save(output_path)
+        # отображение закрывается только без ссылок на его буфер
+        del image_array, raw_array
 
 
 def bw_to_raw(png_path, raw_path):
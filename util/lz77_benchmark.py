@@ -0,0 +1,25 @@
+import time
+
+from compressing_algorithms import ha, lz77
+
+
+def benchmark_levels(input_file, levels=tuple(lz77.LEVELS)):
+    with open(input_file, 'rb') as f:
+        data = f.read()
+
+    print(f"{'уровень':>7} {'стратегия':>9} {'МБ/с':>7} {'токены':>10} {'LZ77+HA':>10} {'коэф.':>6}")
+    for level in levels:
+        start_time = time.time()
+        tokens = lz77.lz77_compress(data, show_progress=False, level=level)
+        elapsed = time.time() - start_time
+        compressed, _ = ha.huffman_compress(tokens)
+
+        speed = len(data) / elapsed / (1024 * 1024)
+        ratio = len(data) / len(compressed)
+        strategy = lz77.LEVELS[level][2]
+        print(f"{level:>7} {strategy:>9} {speed:>7.2f} {len(tokens):>10} {len(compressed):>10} {ratio:>6.2f}")
+
+
+if __name__ == "__main__":
+    # запускать из корня репозитория: python -m util.lz77_benchmark
+    benchmark_levels("test_files/Master.txt")
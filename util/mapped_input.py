@@ -0,0 +1,58 @@
+import mmap
+import os
+from contextlib import contextmanager
+
+from util import parallel
+
+
+@contextmanager
+def open_mapped(path):
+    """
+    Файл, отображённый в память, как memoryview только для чтения.
+    Срезы — окна в отображение, а не копии, поэтому в памяти держатся только страницы, к которым обращались.
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            # пустой файл отобразить нельзя
+            yield memoryview(b'')
+            return
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapping)
+    try:
+        yield view
+    finally:
+        try:
+            view.release()
+            mapping.close()
+        except BufferError:
+            # на отображение ещё ссылается чей-то срез или массив; оно закроется вместе с последней ссылкой
+            pass
+
+
+@contextmanager
+def open_input(path, use_mmap=False):
+    """Всё содержимое файла: memoryview отображения (use_mmap) или bytes из read()"""
+    if use_mmap:
+        with open_mapped(path) as view:
+            yield view
+    else:
+        with open(path, 'rb') as file:
+            yield file.read()
+
+
+def map_blocks(view, block_size):
+    """Блоки по block_size байт как срезы memoryview, без копирования"""
+    for start in range(0, len(view), block_size):
+        yield view[start:start + block_size]
+
+
+@contextmanager
+def open_blocks(path, block_size, use_mmap=False):
+    """Блоки файла: срезы отображения (use_mmap) или bytes из read(block_size)"""
+    if use_mmap:
+        with open_mapped(path) as view:
+            yield map_blocks(view, block_size)
+    else:
+        with open(path, 'rb') as file:
+            yield parallel.read_blocks(file, block_size)
@@ -0,0 +1,141 @@
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def read_blocks(file, block_size):
+    """Чтение файла блоками по block_size байт; блоки читаются лениво, по мере запроса"""
+    while True:
+        block = file.read(block_size)
+        if not block:
+            return
+        yield block
+
+
+def imap_ordered(func, items, workers=None, max_pending=None):
+    """
+    Параллельный map по процессам с результатами в порядке items.
+    Одновременно в работе не больше max_pending задач, поэтому items читается не дальше, чем успевает
+    запись результатов, и память ограничена max_pending блоками на входе и на выходе.
+    :param func: функция уровня модуля (передаётся в процессы через pickle)
+    :param items: блоки (bytes или memoryview, например из mapped_input.map_blocks)
+    :param workers: число процессов (None — по числу ядер, 1 — без пула, в текущем процессе)
+    :param max_pending: размер очереди задач (None — два на процесс)
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(func, items)
+        return
+
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        try:
+            for item in items:
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+                if isinstance(item, memoryview):
+                    # memoryview не передаётся через pickle: в процесс уходит копия одного блока
+                    item = bytes(item)
+                pending.append(pool.submit(func, item))
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # при ошибке или досрочном выходе не ждём блоки, которые уже никто не запишет
+            for future in pending:
+                future.cancel()
+
+
+_DONE = object()  # конец очереди
+
+
+def _put(q, item, stop):
+    """put в ограниченную очередь, который не зависает навсегда, если другая сторона уже остановилась"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def map_threaded(func, items, write, workers=None, max_pending=None, executor=None):
+    """
+    Конвейер чтение -> сжатие -> запись: поток-читатель заранее выбирает items в ограниченную очередь,
+    func выполняется в executor, поток-писатель передаёт результаты в write строго по порядку.
+    Пока блоки сжимаются, следующие уже читаются, а готовые пишутся, так что диск и процессор работают одновременно.
+    :param func: функция над одним элементом (для ProcessPoolExecutor — уровня модуля)
+    :param write: вызывается в потоке-писателе для каждого результата по порядку
+    :param workers: число потоков сжатия (None — по числу ядер), если executor не передан
+    :param max_pending: сколько элементов может быть прочитано, но ещё не записано (None — два на поток)
+    :param executor: готовый executor, например ProcessPoolExecutor; по умолчанию ThreadPoolExecutor
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    read_queue = queue.Queue(max_pending)
+    write_queue = queue.Queue(max_pending)
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        try:
+            for item in items:
+                if not _put(read_queue, item, stop):
+                    return
+        except BaseException as error:
+            errors.append(error)
+            stop.set()
+        _put(read_queue, _DONE, stop)
+
+    def writer():
+        while True:
+            future = write_queue.get()
+            if future is _DONE:
+                return
+            if stop.is_set():
+                future.cancel()
+                continue
+            try:
+                write(future.result())
+            except BaseException as error:
+                errors.append(error)
+                stop.set()
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    reader_thread = threading.Thread(target=reader, name="block-reader", daemon=True)
+    writer_thread = threading.Thread(target=writer, name="block-writer", daemon=True)
+    reader_thread.start()
+    writer_thread.start()
+
+    try:
+        while not stop.is_set():
+            try:
+                item = read_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                break
+            if isinstance(item, memoryview) and not isinstance(executor, ThreadPoolExecutor):
+                item = bytes(item)
+            if not _put(write_queue, executor.submit(func, item), stop):
+                break
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        # писатель дочитывает очередь до _DONE, даже если уже остановлен
+        write_queue.put(_DONE)
+        writer_thread.join()
+        stop.set()
+        reader_thread.join()
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
+    if errors:
+        raise errors[0]